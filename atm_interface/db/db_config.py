@@ -1,7 +1,11 @@
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from typing import Optional, Dict, Any
+from sqlalchemy import and_, column, delete, insert, literal_column, select, table, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Optional, Dict, Any, List, AsyncIterator, Sequence
 import logging
 
 # Configure logging
@@ -11,132 +15,262 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Connection pool sizing
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Connections opened at startup so the first requests skip connection setup
+DB_POOL_WARM_SIZE = int(os.getenv("DB_POOL_WARM_SIZE", "5"))
+
+# Per-connection LRU of asyncpg prepared statements, keyed by SQL text. Every
+# statement goes through conn.prepare() once per connection, so PostgreSQL
+# parses and plans the hot account queries once instead of on every call.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+def _table(name: str, columns) -> Any:
+    """Build a lightweight table clause so identifiers are always quoted."""
+    return table(name, *(column(c) for c in columns))
+
+def _where(tbl, query: Dict[str, Any]):
+    """Build an AND-ed equality filter from a query dict."""
+    return and_(*(tbl.c[k] == v for k, v in query.items()))
+
 class DatabaseConfig:
+    """
+    Process-wide database access on a pooled asyncpg engine.
+
+    Every query helper is a coroutine that does real non-blocking I/O and
+    must be awaited; none of them block the event loop.
+    """
     _instance = None
-    _client: Optional[Client] = None
+    _engine: Optional[AsyncEngine] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DatabaseConfig, cls).__new__(cls)
-            cls._instance._initialize_client()
+            cls._instance._initialize_engine()
         return cls._instance
 
-    def _initialize_client(self):
-        """Initialize Supabase client with environment variables."""
+    def _initialize_engine(self):
+        """Initialize the async SQLAlchemy engine (asyncpg driver) from environment variables."""
         try:
-            supabase_url = os.getenv("SUPABASE_URL")
-            supabase_key = os.getenv("SUPABASE_KEY")
+            database_url = os.getenv("DATABASE_URL")
 
-            if not supabase_url or not supabase_key:
-                raise ValueError("Missing Supabase credentials in environment variables")
+            if not database_url:
+                raise ValueError("Missing DATABASE_URL in environment variables")
 
-            self._client = create_client(supabase_url, supabase_key)
-            logger.info("Supabase client initialized successfully")
+            self._engine = create_async_engine(
+                database_url,
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=True,
+                # PostgreSQL JIT makes asyncpg's first query per connection very slow
+                connect_args={
+                    "server_settings": {"jit": "off"},
+                    "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+                },
+            )
+            logger.info("Database engine initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize Supabase client: {str(e)}")
+            logger.error(f"Failed to initialize database engine: {str(e)}")
             raise
 
     @property
-    def client(self) -> Client:
-        """Get the Supabase client instance."""
-        if not self._client:
-            self._initialize_client()
-        return self._client
+    def engine(self) -> AsyncEngine:
+        """Get the async engine instance."""
+        if not self._engine:
+            self._initialize_engine()
+        return self._engine
+
+    def transaction(self):
+        """
+        Open a pooled connection inside a transaction.
+
+        Pass the yielded connection as ``conn`` to the record helpers to run
+        several statements on one connection, committed together on exit.
+        """
+        return self.engine.begin()
 
-    def execute_query(self, query: str, params: Dict[str, Any] = None) -> Any:
+    @asynccontextmanager
+    async def _connect(self, conn: Optional[AsyncConnection]) -> AsyncIterator[AsyncConnection]:
+        """Reuse the caller's connection, or check one out of the pool."""
+        if conn is not None:
+            yield conn
+        else:
+            async with self.engine.begin() as new_conn:
+                yield new_conn
+
+    async def warm_up(self, size: int = DB_POOL_WARM_SIZE):
+        """
+        Open pooled connections ahead of the first requests.
+
+        Args:
+            size (int, optional): Number of connections to open, capped at the pool size
+        """
+        results = await asyncio.gather(
+            *(self.engine.connect() for _ in range(min(size, DB_POOL_SIZE))),
+            return_exceptions=True
+        )
+        conns = [r for r in results if not isinstance(r, BaseException)]
+        # Closing returns each connection to the pool rather than disconnecting it
+        await asyncio.gather(*(conn.close() for conn in conns))
+        if len(conns) < len(results):
+            # Not fatal: the pool still connects lazily once the database is reachable
+            error = next(r for r in results if isinstance(r, BaseException))
+            logger.error(f"Failed to warm database pool: {str(error)}")
+        else:
+            logger.info(f"Database pool warmed with {len(conns)} connections")
+
+    async def close(self):
+        """Dispose of the engine and close all pooled connections."""
+        if self._engine:
+            await self._engine.dispose()
+
+    async def execute_query(self, query: str, params: Dict[str, Any] = None, conn: Optional[AsyncConnection] = None) -> List[Dict[str, Any]]:
         """
         Execute a raw SQL query.
-        
+
         Args:
-            query (str): SQL query to execute
+            query (str): SQL query to execute, using :name bind parameters
             params (Dict[str, Any], optional): Query parameters
-            
+            conn (AsyncConnection, optional): Connection to reuse, e.g. from transaction()
+
         Returns:
-            Any: Query results
+            List[Dict[str, Any]]: Query results
         """
         try:
-            response = self.client.rpc('execute_query', {
-                'query': query,
-                'params': params or {}
-            })
-            return response
+            async with self._connect(conn) as conn:
+                result = await conn.execute(text(query), params or {})
+                if not result.returns_rows:
+                    return []
+                return [dict(row) for row in result.mappings()]
         except Exception as e:
             logger.error(f"Query execution failed: {str(e)}")
             raise
 
-    def insert_record(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def stream_query(self, query: str, params: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a raw SQL query through a server-side cursor.
+
+        A pooled connection is checked out when iteration starts and goes
+        back to the pool once the iterator is exhausted or closed, so an
+        iterator that is never started holds nothing. Rows are fetched in
+        batches as they are consumed.
+
+        Args:
+            query (str): SQL query to execute, using :name bind parameters
+            params (Dict[str, Any], optional): Query parameters
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Query results
+        """
+        async with self.engine.connect() as conn:
+            try:
+                result = await conn.stream(text(query), params or {})
+            except Exception as e:
+                logger.error(f"Query execution failed: {str(e)}")
+                raise
+            async for row in result.mappings():
+                yield dict(row)
+
+    async def insert_record(self, table: str, data: Dict[str, Any], conn: Optional[AsyncConnection] = None) -> Dict[str, Any]:
         """
         Insert a record into the specified table.
-        
+
         Args:
             table (str): Table name
             data (Dict[str, Any]): Record data
-            
+            conn (AsyncConnection, optional): Connection to reuse, e.g. from transaction()
+
         Returns:
             Dict[str, Any]: Inserted record
         """
         try:
-            response = self.client.table(table).insert(data).execute()
-            return response.data[0] if response.data else None
+            tbl = _table(table, data)
+            stmt = insert(tbl).values(data).returning(literal_column('*'))
+            async with self._connect(conn) as conn:
+                row = (await conn.execute(stmt)).mappings().first()
+            return dict(row) if row else None
         except Exception as e:
             logger.error(f"Failed to insert record into {table}: {str(e)}")
             raise
 
-    def get_record(self, table: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def get_record(self, table: str, query: Dict[str, Any], conn: Optional[AsyncConnection] = None, columns: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
         """
         Get a single record from the specified table.
 
         Args:
             table (str): Table name
             query (Dict[str, Any]): Query conditions
+            conn (AsyncConnection, optional): Connection to reuse, e.g. from transaction()
+            columns (Sequence[str], optional): Columns to fetch; all columns if omitted
 
         Returns:
             Optional[Dict[str, Any]]: Retrieved record
         """
         try:
-            response = self.client.table(table).select("*").match(query).execute()
-            
-            if response.data:
-                return response.data[0]
+            if columns:
+                tbl = _table(table, {*query, *columns})
+                stmt = select(*(tbl.c[c] for c in columns))
+            else:
+                tbl = _table(table, query)
+                stmt = select(literal_column('*')).select_from(tbl)
+            stmt = stmt.where(_where(tbl, query)).limit(1)
+            async with self._connect(conn) as conn:
+                row = (await conn.execute(stmt)).mappings().first()
+
+            if row:
+                return dict(row)
             else:
                 return None
         except Exception as e:
             logger.error(f"Failed to get record from {table}: {str(e)}")
             raise
 
-    def update_record(self, table: str, query: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_record(self, table: str, query: Dict[str, Any], data: Dict[str, Any], conn: Optional[AsyncConnection] = None) -> Dict[str, Any]:
         """
         Update a record in the specified table.
-        
+
         Args:
             table (str): Table name
             query (Dict[str, Any]): Query conditions
             data (Dict[str, Any]): Update data
-            
+            conn (AsyncConnection, optional): Connection to reuse, e.g. from transaction()
+
         Returns:
             Dict[str, Any]: Updated record
         """
         try:
-            response = self.client.table(table).update(data).match(query).execute()
-            return response.data[0] if response.data else None
+            tbl = _table(table, {**query, **data})
+            stmt = update(tbl).where(_where(tbl, query)).values(data).returning(literal_column('*'))
+            async with self._connect(conn) as conn:
+                row = (await conn.execute(stmt)).mappings().first()
+            return dict(row) if row else None
         except Exception as e:
             logger.error(f"Failed to update record in {table}: {str(e)}")
             raise
 
-    def delete_record(self, table: str, query: Dict[str, Any]) -> bool:
+    async def delete_record(self, table: str, query: Dict[str, Any], conn: Optional[AsyncConnection] = None) -> bool:
         """
         Delete a record from the specified table.
-        
+
         Args:
             table (str): Table name
             query (Dict[str, Any]): Query conditions
-            
+            conn (AsyncConnection, optional): Connection to reuse, e.g. from transaction()
+
         Returns:
             bool: True if deletion was successful
         """
         try:
-            response = self.client.table(table).delete().match(query).execute()
-            return bool(response.data)
+            tbl = _table(table, query)
+            async with self._connect(conn) as conn:
+                result = await conn.execute(delete(tbl).where(_where(tbl, query)))
+            return result.rowcount > 0
         except Exception as e:
             logger.error(f"Failed to delete record from {table}: {str(e)}")
             raise
@@ -0,0 +1,7 @@
+-- Composite index for account history: filter by account, read newest first.
+-- Supersedes idx_transactions_account_id (its leading column covers the same lookups).
+-- CONCURRENTLY cannot run inside a transaction block; run this file on its own.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_account_created
+    ON transactions(account_id, created_at DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_account_id;
@@ -0,0 +1,4 @@
+-- Columns used by the password reset flow in utils/auth.py.
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS reset_token TEXT,
+    ADD COLUMN IF NOT EXISTS reset_token_expires TIMESTAMP WITH TIME ZONE;
@@ -0,0 +1,7 @@
+-- Composite index for list_accounts keyset pagination: filter by user, page by id.
+-- Supersedes idx_accounts_user_id (its leading column covers the same lookups).
+-- CONCURRENTLY cannot run inside a transaction block; run this file on its own.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_accounts_user_id_id
+    ON accounts(user_id, id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_accounts_user_id;
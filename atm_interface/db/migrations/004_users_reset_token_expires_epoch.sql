@@ -0,0 +1,5 @@
+-- Store reset token expiries as epoch seconds, matching the JWT exp claim
+-- that utils/auth.py writes and compares against time.time().
+ALTER TABLE users
+    ALTER COLUMN reset_token_expires TYPE BIGINT
+    USING EXTRACT(EPOCH FROM reset_token_expires)::BIGINT;
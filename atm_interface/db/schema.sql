@@ -9,6 +9,8 @@ CREATE TABLE IF NOT EXISTS users (
     full_name VARCHAR(100) NOT NULL,
     email VARCHAR(100) UNIQUE NOT NULL,
     phone_number VARCHAR(20),
+    reset_token TEXT,
+    reset_token_expires BIGINT, -- epoch seconds
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -51,9 +53,9 @@ CREATE TABLE IF NOT EXISTS cards (
 
 -- Create indexes for better query performance
 CREATE INDEX idx_users_username ON users(username);
-CREATE INDEX idx_accounts_user_id ON accounts(user_id);
+CREATE INDEX idx_accounts_user_id_id ON accounts(user_id, id);
 CREATE INDEX idx_accounts_account_number ON accounts(account_number);
-CREATE INDEX idx_transactions_account_id ON transactions(account_id);
+CREATE INDEX idx_transactions_account_created ON transactions(account_id, created_at DESC);
 CREATE INDEX idx_transactions_created_at ON transactions(created_at);
 CREATE INDEX idx_cards_account_id ON cards(account_id);
 CREATE INDEX idx_cards_card_number ON cards(card_number);
@@ -1,7 +1,8 @@
 from datetime import datetime
+from decimal import Decimal
 from typing import Optional
 from uuid import UUID
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 class TransactionType(str, Enum):
@@ -26,7 +27,7 @@ class TransactionCategory(str, Enum):
 class TransactionBase(BaseModel):
     account_id: UUID
     transaction_type: TransactionType
-    amount: float = Field(..., gt=0)
+    amount: Decimal = Field(..., gt=0, max_digits=15, decimal_places=2)
     description: Optional[str] = None
     category: Optional[TransactionCategory] = TransactionCategory.OTHER
 
@@ -40,22 +41,11 @@ class TransactionUpdate(BaseModel):
 
 class Transaction(TransactionBase):
     id: UUID
-    balance_after: float
+    balance_after: Decimal = Field(..., max_digits=15, decimal_places=2)
     status: TransactionStatus = TransactionStatus.COMPLETED
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
-    @validator('amount')
-    def validate_amount(cls, v):
-        if v <= 0:
-            raise ValueError('Amount must be greater than 0')
-        return round(v, 2)
-
-    @validator('balance_after')
-    def validate_balance(cls, v):
-        return round(v, 2)
+    model_config = ConfigDict(from_attributes=True)
 
 class TransactionResponse(BaseModel):
     transaction: Transaction
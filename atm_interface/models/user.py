@@ -4,6 +4,18 @@ from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
 import re
 
+# Validation patterns, compiled once at import
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_]+$')
+_PHONE_RE = re.compile(r'^\+?1?\d{9,15}$')
+_PIN_RE = re.compile(r'^\d{4}$')
+_SPECIAL_CHARS = frozenset('!@#$%^&*(),.?":{}|<>')
+
+# Password strength requirement bits
+_HAS_UPPER = 1
+_HAS_LOWER = 2
+_HAS_DIGIT = 4
+_HAS_SPECIAL = 8
+
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
     full_name: str = Field(..., min_length=2, max_length=100)
@@ -13,7 +25,7 @@ class UserBase(BaseModel):
     @field_validator('username')
     @classmethod
     def username_alphanumeric(cls, v: str) -> str:
-        if not re.match("^[a-zA-Z0-9_]+$", v):
+        if not _USERNAME_RE.match(v):
             raise ValueError('Username must be alphanumeric')
         return v
 
@@ -21,7 +33,7 @@ class UserBase(BaseModel):
     @classmethod
     def validate_phone(cls, v: Optional[str]) -> Optional[str]:
         if v is not None:
-            if not re.match(r'^\+?1?\d{9,15}$', v):
+            if not _PHONE_RE.match(v):
                 raise ValueError('Invalid phone number format')
         return v
 
@@ -31,7 +43,7 @@ class UserCreate(UserBase):
     @field_validator('pin')
     @classmethod
     def pin_digits(cls, v: str) -> str:
-        if not re.match(r'^\d{4}$', v):
+        if not _PIN_RE.match(v):
             raise ValueError('PIN must be a 4-digit number')
         return v
 
@@ -45,7 +57,7 @@ class UserUpdate(BaseModel):
     @classmethod
     def validate_phone(cls, v: Optional[str]) -> Optional[str]:
         if v is not None:
-            if not re.match(r'^\+?1?\d{9,15}$', v):
+            if not _PHONE_RE.match(v):
                 raise ValueError('Invalid phone number format')
         return v
 
@@ -53,13 +65,24 @@ class UserUpdate(BaseModel):
     @classmethod
     def password_strength(cls, v: Optional[str]) -> Optional[str]:
         if v is not None:
-            if not re.search(r'[A-Z]', v):
+            # Single pass over the password collecting which character classes appear
+            flags = 0
+            for c in v:
+                if 'A' <= c <= 'Z':
+                    flags |= _HAS_UPPER
+                elif 'a' <= c <= 'z':
+                    flags |= _HAS_LOWER
+                elif c.isdecimal():
+                    flags |= _HAS_DIGIT
+                elif c in _SPECIAL_CHARS:
+                    flags |= _HAS_SPECIAL
+            if not flags & _HAS_UPPER:
                 raise ValueError('Password must contain at least one uppercase letter')
-            if not re.search(r'[a-z]', v):
+            if not flags & _HAS_LOWER:
                 raise ValueError('Password must contain at least one lowercase letter')
-            if not re.search(r'\d', v):
+            if not flags & _HAS_DIGIT:
                 raise ValueError('Password must contain at least one number')
-            if not re.search(r'[!@#$%^&*(),.?":{}|<>]', v):
+            if not flags & _HAS_SPECIAL:
                 raise ValueError('Password must contain at least one special character')
         return v
 
@@ -78,6 +101,13 @@ class UserLogin(BaseModel):
     username: str
     pin: str
 
+class ResetRequestSchema(BaseModel):
+    email: EmailStr
+
+class ResetConfirmSchema(BaseModel):
+    token: str
+    new_password: str = Field(..., min_length=8)
+
 class UserLoginResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
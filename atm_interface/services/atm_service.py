@@ -1,9 +1,11 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from uuid import UUID
 from datetime import datetime
+from decimal import Decimal
 from db.db_config import db
-from models.transaction import Transaction, TransactionType, TransactionStatus, TransactionCreate
+from models.transaction import TransactionType, TransactionStatus
 from models.user import User
+import hmac
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,7 +17,7 @@ class ATMService:
     async def check_balance(self, account_id: UUID) -> Dict[str, Any]:
         """Check account balance"""
         try:
-            account = await self.db.get_record('accounts', {'id': account_id})
+            account = await self.db.get_record('accounts', {'id': account_id}, columns=('balance', 'account_type'))
             if not account:
                 raise ValueError("Account not found")
             return {
@@ -27,118 +29,138 @@ class ATMService:
             logger.error(f"Error checking balance: {str(e)}")
             raise
 
-    async def deposit(self, account_id: UUID, amount: float, description: Optional[str] = None) -> Transaction:
-        """Process deposit transaction"""
+    async def deposit(self, account_id: UUID, amount: Decimal, description: Optional[str] = None) -> Dict[str, Any]:
+        """Process deposit transaction: credit the account and record it in one statement"""
         try:
-            # Get current account
-            account = await self.db.get_record('accounts', {'id': account_id})
-            if not account:
-                raise ValueError("Account not found")
-            
-            # Create transaction
-            transaction_data = TransactionCreate(
-                account_id=account_id,
-                transaction_type=TransactionType.DEPOSIT,
-                amount=amount,
-                description=description or "ATM Deposit"
-            )
-            
-            # Update account balance
-            new_balance = account['balance'] + amount
-            await self.db.update_record('accounts', 
-                {'id': account_id}, 
-                {'balance': new_balance}
+            rows = await self.db.execute_query(
+                """
+                WITH updated AS (
+                    UPDATE accounts SET balance = balance + :amount
+                    WHERE id = :account_id
+                    RETURNING id, balance
+                )
+                INSERT INTO transactions (account_id, transaction_type, amount, balance_after, description, status)
+                SELECT id, :transaction_type, :amount, balance, :description, :status FROM updated
+                RETURNING *
+                """,
+                {
+                    'account_id': account_id,
+                    'amount': amount,
+                    'transaction_type': TransactionType.DEPOSIT.value,
+                    'description': description or "ATM Deposit",
+                    'status': TransactionStatus.COMPLETED.value
+                }
             )
-            
-            # Record transaction
-            transaction = await self.db.insert_record('transactions', {
-                **transaction_data.dict(),
-                'balance_after': new_balance,
-                'status': TransactionStatus.COMPLETED
-            })
-            
-            return Transaction(**transaction)
+            if not rows:
+                raise ValueError("Account not found")
+            return rows[0]
         except Exception as e:
             logger.error(f"Error processing deposit: {str(e)}")
             raise
 
-    async def withdraw(self, account_id: UUID, amount: float, description: Optional[str] = None) -> Transaction:
-        """Process withdrawal transaction"""
+    async def withdraw(self, account_id: UUID, amount: Decimal, description: Optional[str] = None) -> Dict[str, Any]:
+        """Process withdrawal transaction: debit the account and record it in one statement"""
         try:
-            # Get current account
-            account = await self.db.get_record('accounts', {'id': account_id})
-            if not account:
-                raise ValueError("Account not found")
-            
-            # Check sufficient balance
-            if account['balance'] < amount:
-                raise ValueError("Insufficient funds")
-            
-            # Create transaction
-            transaction_data = TransactionCreate(
-                account_id=account_id,
-                transaction_type=TransactionType.WITHDRAWAL,
-                amount=amount,
-                description=description or "ATM Withdrawal"
-            )
-            
-            # Update account balance
-            new_balance = account['balance'] - amount
-            await self.db.update_record('accounts', 
-                {'id': account_id}, 
-                {'balance': new_balance}
+            # The balance guard makes the check-and-debit atomic
+            rows = await self.db.execute_query(
+                """
+                WITH updated AS (
+                    UPDATE accounts SET balance = balance - :amount
+                    WHERE id = :account_id AND balance >= :amount
+                    RETURNING id, balance
+                )
+                INSERT INTO transactions (account_id, transaction_type, amount, balance_after, description, status)
+                SELECT id, :transaction_type, :amount, balance, :description, :status FROM updated
+                RETURNING *
+                """,
+                {
+                    'account_id': account_id,
+                    'amount': amount,
+                    'transaction_type': TransactionType.WITHDRAWAL.value,
+                    'description': description or "ATM Withdrawal",
+                    'status': TransactionStatus.COMPLETED.value
+                }
             )
-            
-            # Record transaction
-            transaction = await self.db.insert_record('transactions', {
-                **transaction_data.dict(),
-                'balance_after': new_balance,
-                'status': TransactionStatus.COMPLETED
-            })
-            
-            return Transaction(**transaction)
+            if not rows:
+                # Only the failure path pays for a second lookup to pick the error
+                account = await self.db.get_record('accounts', {'id': account_id}, columns=('id',))
+                if not account:
+                    raise ValueError("Account not found")
+                raise ValueError("Insufficient funds")
+            return rows[0]
         except Exception as e:
             logger.error(f"Error processing withdrawal: {str(e)}")
             raise
 
-    async def transfer(self, from_account_id: UUID, to_account_id: UUID, amount: float, description: Optional[str] = None) -> Dict[str, Transaction]:
-        """Process transfer between accounts"""
+    async def transfer(self, from_account_id: UUID, to_account_id: UUID, amount: Decimal, description: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Process transfer between accounts atomically in a single statement"""
         try:
-            # Get both accounts
-            from_account = await self.db.get_record('accounts', {'id': from_account_id})
-            to_account = await self.db.get_record('accounts', {'id': to_account_id})
-            
-            if not from_account or not to_account:
-                raise ValueError("One or both accounts not found")
-            
-            # Check sufficient balance
-            if from_account['balance'] < amount:
-                raise ValueError("Insufficient funds")
-            
-            # Process withdrawal from source account
-            withdrawal = await self.withdraw(
-                from_account_id, 
-                amount, 
-                f"Transfer to {to_account['account_number']}"
-            )
-            
-            # Process deposit to destination account
-            deposit = await self.deposit(
-                to_account_id, 
-                amount, 
-                f"Transfer from {from_account['account_number']}"
+            if from_account_id == to_account_id:
+                # A statement cannot update the same row twice
+                raise ValueError("Cannot transfer to the same account")
+
+            # Lock both rows, lowest id first, so concurrent transfers cannot deadlock;
+            # debit only if the balance covers the amount, then credit and record both legs
+            transactions = await self.db.execute_query(
+                """
+                WITH locked AS (
+                    SELECT id, account_number FROM accounts
+                    WHERE id IN (:from_id, :to_id)
+                    ORDER BY id
+                    FOR UPDATE
+                ),
+                debited AS (
+                    UPDATE accounts SET balance = balance - :amount
+                    WHERE id = :from_id AND balance >= :amount
+                      AND (SELECT count(*) FROM locked) = 2
+                    RETURNING id, balance
+                ),
+                credited AS (
+                    UPDATE accounts SET balance = balance + :amount
+                    WHERE id = :to_id AND EXISTS (SELECT 1 FROM debited)
+                    RETURNING id, balance
+                )
+                INSERT INTO transactions (account_id, transaction_type, amount, balance_after, description, status)
+                SELECT d.id, :withdrawal, :amount, d.balance,
+                       COALESCE(:description, 'Transfer to ' || l.account_number), :status
+                FROM debited d JOIN locked l ON l.id = :to_id
+                UNION ALL
+                SELECT c.id, :deposit, :amount, c.balance,
+                       COALESCE(:description, 'Transfer from ' || l.account_number), :status
+                FROM credited c JOIN locked l ON l.id = :from_id
+                RETURNING *
+                """,
+                {
+                    'from_id': from_account_id,
+                    'to_id': to_account_id,
+                    'withdrawal': TransactionType.WITHDRAWAL.value,
+                    'deposit': TransactionType.DEPOSIT.value,
+                    'amount': amount,
+                    'description': description or None,
+                    'status': TransactionStatus.COMPLETED.value
+                }
             )
-            
+            if not transactions:
+                # Only the failure path pays for a second lookup to pick the error
+                found = await self.db.execute_query(
+                    "SELECT count(*) AS n FROM accounts WHERE id IN (:from_id, :to_id)",
+                    {'from_id': from_account_id, 'to_id': to_account_id}
+                )
+                if found[0]['n'] < 2:
+                    raise ValueError("One or both accounts not found")
+                raise ValueError("Insufficient funds")
+
+            legs = {t['transaction_type']: t for t in transactions}
             return {
-                "withdrawal": withdrawal,
-                "deposit": deposit
+                "withdrawal": legs[TransactionType.WITHDRAWAL.value],
+                "deposit": legs[TransactionType.DEPOSIT.value]
             }
         except Exception as e:
             logger.error(f"Error processing transfer: {str(e)}")
             raise
 
-    async def get_transaction_history(self, account_id: UUID, limit: int = 10) -> list[Transaction]:
-        """Get recent transaction history"""
+    async def get_transaction_history(self, account_id: UUID, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get recent transaction history as raw rows; they come from our own DB so skip model validation"""
         try:
             transactions = await self.db.execute_query(
                 """
@@ -149,7 +171,7 @@ class ATMService:
                 """,
                 {'account_id': account_id, 'limit': limit}
             )
-            return [Transaction(**t) for t in transactions]
+            return transactions
         except Exception as e:
             logger.error(f"Error fetching transaction history: {str(e)}")
             raise
@@ -157,18 +179,21 @@ class ATMService:
     async def validate_card(self, card_number: str, pin: str) -> Dict[str, Any]:
         """Validate ATM card and PIN"""
         try:
-            card = await self.db.get_record('cards', {'card_number': card_number})
+            card = await self.db.get_record(
+                'cards', {'card_number': card_number},
+                columns=('id', 'account_id', 'pin_hash', 'status')
+            )
             if not card:
                 raise ValueError("Invalid card")
             
             # In production, use proper password hashing
-            if card['pin_hash'] != pin:  # This is just for demo
+            if not hmac.compare_digest(card['pin_hash'].encode(), pin.encode()):  # This is just for demo
                 raise ValueError("Invalid PIN")
             
             if card['status'] != 'ACTIVE':
                 raise ValueError("Card is not active")
             
-            account = await self.db.get_record('accounts', {'id': card['account_id']})
+            account = await self.db.get_record('accounts', {'id': card['account_id']}, columns=('id', 'account_number'))
             if not account:
                 raise ValueError("Account not found")
             
@@ -6,7 +6,15 @@ setup(
     packages=find_packages(),
     install_requires=[
         "pydantic",
-        "supabase",
+        "quart",
+        "sqlalchemy[asyncio]",
+        "asyncpg",
+        "argon2-cffi",
+        "orjson",
+        "redis",
+        "PyJWT",
+        "python-dotenv",
+        "flask-swagger-ui",
         "pytest",
         "pytest-asyncio",
         "email-validator"
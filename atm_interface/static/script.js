@@ -88,6 +88,15 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Event listener for logout button
     logoutButton.addEventListener('click', () => {
+        // Revoke the token server-side; the local state is cleared either way
+        if (accessToken) {
+            fetch('/auth/logout', {
+                method: 'POST',
+                headers: {
+                    'Authorization': `Bearer ${accessToken}`
+                }
+            }).catch(error => console.error('Logout error:', error));
+        }
         // Clear token and account data
         accessToken = null;
         userAccounts = [];
@@ -254,7 +263,7 @@ document.addEventListener('DOMContentLoaded', () => {
             const result = await response.json();
 
             if (response.ok) {
-                balanceDisplay.textContent = `Balance: $${result.balance.toFixed(2)}`;
+                balanceDisplay.textContent = `Balance: $${Number(result.balance).toFixed(2)}`;
                  balanceDisplay.style.color = '#28a745'; // Green color for success
             } else {
                 balanceDisplay.textContent = `Failed to fetch balance: ${result.error || response.statusText}`;
@@ -340,7 +349,7 @@ document.addEventListener('DOMContentLoaded', () => {
                  const resultMessageElement = document.getElementById('result-message');
 
                  if (response.ok) {
-                     resultMessageElement.textContent = `Deposit successful. New balance: $${result.balance_after.toFixed(2)}`;
+                     resultMessageElement.textContent = `Deposit successful. New balance: $${Number(result.balance_after).toFixed(2)}`;
                       resultMessageElement.style.color = '#28a745';
                  } else {
                      resultMessageElement.textContent = `Deposit failed: ${result.error || response.statusText}`;
@@ -370,7 +379,7 @@ document.addEventListener('DOMContentLoaded', () => {
                  const resultMessageElement = document.getElementById('result-message');
 
                  if (response.ok) {
-                     resultMessageElement.textContent = `Withdrawal successful. New balance: $${result.balance_after.toFixed(2)}`;
+                     resultMessageElement.textContent = `Withdrawal successful. New balance: $${Number(result.balance_after).toFixed(2)}`;
                       resultMessageElement.style.color = '#28a745';
                  } else {
                      // Handle specific insufficient funds error or general failure
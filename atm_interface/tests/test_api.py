@@ -0,0 +1,134 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from uuid import uuid4
+from decimal import Decimal
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from unittest.mock import patch, AsyncMock, PropertyMock
+import main
+from sqlalchemy.exc import IntegrityError
+from db.db_config import DatabaseConfig
+from utils import json_provider
+from utils.auth import create_access_token
+
+@pytest.mark.asyncio
+async def test_balance_response_encodes_money_as_decimal_string():
+    """Test balances go over the wire as exact decimal strings, which the frontend parses with Number()"""
+    account_id = uuid4()
+    result = {"account_id": account_id, "balance": Decimal('1250.50'), "account_type": "SAVINGS"}
+    headers = {"Authorization": f"Bearer {create_access_token(str(uuid4()))}"}
+
+    with patch.object(main.atm_service, 'check_balance', new_callable=AsyncMock, return_value=result):
+        response = await main.app.test_client().get(f"/accounts/{account_id}/balance", headers=headers)
+
+    assert response.status_code == 200
+    body = await response.get_json()
+    assert isinstance(body["balance"], str)
+    assert body["balance"] == "1250.50"
+    assert float(body["balance"]) == 1250.5
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_do_not_leak_details():
+    """Test driver and SQL text from unexpected errors is logged, not returned to the client"""
+    account_id = uuid4()
+    headers = {"Authorization": f"Bearer {create_access_token(str(uuid4()))}"}
+    failures = [
+        (RuntimeError('relation "accounts" does not exist'), 500, "Internal server error"),
+        (IntegrityError("UPDATE accounts SET balance = ...", {}, Exception('violates check constraint "balance_check"')), 400, "Invalid data"),
+    ]
+
+    for error, status, message in failures:
+        with patch.object(main.atm_service, 'check_balance', new_callable=AsyncMock, side_effect=error), \
+             patch.object(main.app.logger, 'exception') as log:
+            response = await main.app.test_client().get(f"/accounts/{account_id}/balance", headers=headers)
+
+        assert response.status_code == status
+        assert await response.get_json() == {"error": message}
+        assert log.call_args.kwargs["exc_info"] is error
+
+class _FakeStreamEngine:
+    """Engine stand-in recording connection checkout and release around a streamed query"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.events = []
+
+    @asynccontextmanager
+    async def connect(self):
+        self.events.append("checkout")
+        try:
+            yield self
+        finally:
+            self.events.append("release")
+
+    async def stream(self, statement, params):
+        return self
+
+    async def mappings(self):
+        for row in self.rows:
+            yield row
+
+@pytest.mark.asyncio
+async def test_history_stream_releases_connection_when_closed_early():
+    """Test an abandoned or unsent history download returns its connection"""
+    account_id = uuid4()
+    row = {
+        "id": uuid4(), "account_id": account_id, "transaction_type": "DEPOSIT",
+        "amount": Decimal('1.00'), "balance_after": Decimal('1.00'), "description": None,
+        "status": "COMPLETED", "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc)
+    }
+    engine = _FakeStreamEngine([row] * 1000)
+    headers = {"Authorization": f"Bearer {create_access_token(str(uuid4()))}"}
+    path = f"/accounts/{account_id}/history"
+
+    with patch.object(DatabaseConfig, 'engine', new_callable=PropertyMock, return_value=engine), \
+         patch.object(json_provider, 'STREAM_CHUNK_SIZE', 256):
+        # The query starts before the response is built; closing the unsent body releases it
+        async with main.app.test_request_context(path, headers=headers):
+            response = await main.app.full_dispatch_request()
+        assert engine.events == ["checkout"]
+        async with response.response as body:
+            pass
+        assert engine.events == ["checkout", "release"]
+        engine.events.clear()
+
+        # Closed after the first chunk: the connection goes straight back
+        async with main.app.test_request_context(path, headers=headers):
+            response = await main.app.full_dispatch_request()
+        assert response.status_code == 200
+        async with response.response as body:
+            async for chunk in body:
+                assert chunk.startswith(b'{"history":[')
+                break
+            assert engine.events == ["checkout"]
+        assert engine.events == ["checkout", "release"]
+
+@pytest.mark.asyncio
+async def test_user_update_rejects_non_json_body():
+    """Test a user update without a JSON object body is a 400 and never reaches the database"""
+    user_id = uuid4()
+    headers = {"Authorization": f"Bearer {create_access_token(str(user_id))}"}
+
+    with patch.object(main.db, 'update_record', new_callable=AsyncMock) as update:
+        for kwargs in ({}, {"form": {"full_name": "Jane Doe"}}, {"json": ["full_name"]}):
+            response = await main.app.test_client().put(f"/users/{user_id}", headers=headers, **kwargs)
+            assert response.status_code == 400
+            assert await response.get_json() == {"error": "Request body must be JSON"}
+    update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_history_query_failure_is_an_error_response():
+    """Test a history query that fails to start gives a 500, not a truncated 200"""
+    engine = _FakeStreamEngine([])
+    engine.stream = AsyncMock(side_effect=RuntimeError("QueuePool limit reached"))
+    headers = {"Authorization": f"Bearer {create_access_token(str(uuid4()))}"}
+
+    with patch.object(DatabaseConfig, 'engine', new_callable=PropertyMock, return_value=engine), \
+         patch.object(main.app.logger, 'exception'):
+        response = await main.app.test_client().get(f"/accounts/{uuid4()}/history", headers=headers)
+
+    assert response.status_code == 500
+    assert await response.get_json() == {"error": "Internal server error"}
+    assert engine.events == ["checkout", "release"]
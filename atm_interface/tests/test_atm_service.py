@@ -45,18 +45,17 @@ async def test_check_balance(atm_service, mock_account):
         assert result['account_id'] == mock_account['id']
         assert result['balance'] == mock_account['balance']
         assert result['account_type'] == mock_account['account_type']
+        mock_get.assert_awaited_once_with('accounts', {'id': mock_account['id']}, columns=('balance', 'account_type'))
 
 @pytest.mark.asyncio
 async def test_deposit(atm_service, mock_account):
     deposit_amount = Decimal('500.00')
     expected_balance = mock_account['balance'] + deposit_amount
     
-    with patch.object(atm_service.db, 'get_record', new_callable=AsyncMock) as mock_get, \
-         patch.object(atm_service.db, 'update_record', new_callable=AsyncMock) as mock_update, \
-         patch.object(atm_service.db, 'insert_record', new_callable=AsyncMock) as mock_insert:
+    with patch.object(atm_service.db, 'execute_query', new_callable=AsyncMock) as mock_query:
         
-        mock_get.return_value = mock_account
-        mock_insert.return_value = {
+        # One statement updates the balance and returns the inserted transaction
+        mock_query.return_value = [{
             'id': uuid4(),
             'account_id': mock_account['id'],
             'transaction_type': TransactionType.DEPOSIT,
@@ -65,26 +64,25 @@ async def test_deposit(atm_service, mock_account):
             'status': TransactionStatus.COMPLETED,
             'description': 'ATM Deposit',
             'created_at': datetime.now()
-        }
+        }]
         
         transaction = await atm_service.deposit(mock_account['id'], deposit_amount)
         
-        assert transaction.transaction_type == TransactionType.DEPOSIT
-        assert transaction.amount == deposit_amount
-        assert transaction.balance_after == expected_balance
-        assert transaction.status == TransactionStatus.COMPLETED
+        assert transaction['transaction_type'] == TransactionType.DEPOSIT
+        assert transaction['amount'] == deposit_amount
+        assert transaction['balance_after'] == expected_balance
+        assert transaction['status'] == TransactionStatus.COMPLETED
+        mock_query.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_withdraw_sufficient_funds(atm_service, mock_account):
     withdrawal_amount = Decimal('500.00')
     expected_balance = mock_account['balance'] - withdrawal_amount
     
-    with patch.object(atm_service.db, 'get_record', new_callable=AsyncMock) as mock_get, \
-         patch.object(atm_service.db, 'update_record', new_callable=AsyncMock) as mock_update, \
-         patch.object(atm_service.db, 'insert_record', new_callable=AsyncMock) as mock_insert:
+    with patch.object(atm_service.db, 'execute_query', new_callable=AsyncMock) as mock_query:
         
-        mock_get.return_value = mock_account
-        mock_insert.return_value = {
+        # One statement updates the balance and returns the inserted transaction
+        mock_query.return_value = [{
             'id': uuid4(),
             'account_id': mock_account['id'],
             'transaction_type': TransactionType.WITHDRAWAL,
@@ -93,25 +91,39 @@ async def test_withdraw_sufficient_funds(atm_service, mock_account):
             'status': TransactionStatus.COMPLETED,
             'description': 'ATM Withdrawal',
             'created_at': datetime.now()
-        }
+        }]
         
         transaction = await atm_service.withdraw(mock_account['id'], withdrawal_amount)
         
-        assert transaction.transaction_type == TransactionType.WITHDRAWAL
-        assert transaction.amount == withdrawal_amount
-        assert transaction.balance_after == expected_balance
-        assert transaction.status == TransactionStatus.COMPLETED
+        assert transaction['transaction_type'] == TransactionType.WITHDRAWAL
+        assert transaction['amount'] == withdrawal_amount
+        assert transaction['balance_after'] == expected_balance
+        assert transaction['status'] == TransactionStatus.COMPLETED
+        mock_query.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_withdraw_insufficient_funds(atm_service, mock_account):
     withdrawal_amount = Decimal('1500.00')  # More than balance
     
-    with patch.object(atm_service.db, 'get_record', new_callable=AsyncMock) as mock_get:
+    with patch.object(atm_service.db, 'execute_query', new_callable=AsyncMock) as mock_query, \
+         patch.object(atm_service.db, 'get_record', new_callable=AsyncMock) as mock_get:
+        # The guarded debit matches no row; the account itself exists
+        mock_query.return_value = []
         mock_get.return_value = mock_account
         
         with pytest.raises(ValueError, match="Insufficient funds"):
             await atm_service.withdraw(mock_account['id'], withdrawal_amount)
 
+@pytest.mark.asyncio
+async def test_withdraw_account_not_found(atm_service):
+    with patch.object(atm_service.db, 'execute_query', new_callable=AsyncMock) as mock_query, \
+         patch.object(atm_service.db, 'get_record', new_callable=AsyncMock) as mock_get:
+        mock_query.return_value = []
+        mock_get.return_value = None
+        
+        with pytest.raises(ValueError, match="Account not found"):
+            await atm_service.withdraw(uuid4(), Decimal('10.00'))
+
 @pytest.mark.asyncio
 async def test_transfer(atm_service, mock_account):
     transfer_amount = Decimal('500.00')
@@ -123,50 +135,68 @@ async def test_transfer(atm_service, mock_account):
         'account_number': '0987654321'
     }
     
-    with patch.object(atm_service.db, 'get_record', new_callable=AsyncMock) as mock_get, \
-         patch.object(atm_service.db, 'update_record', new_callable=AsyncMock) as mock_update, \
-         patch.object(atm_service.db, 'insert_record', new_callable=AsyncMock) as mock_insert:
-        
-        # Setup mock_get to return different values for different calls
-        mock_get.side_effect = [
-            mock_account,  # First call: get from_account
-            to_account,    # Second call: get to_account
-            mock_account,  # Third call: get from_account in withdraw
-            to_account     # Fourth call: get to_account in deposit
-        ]
+    with patch.object(atm_service.db, 'execute_query', new_callable=AsyncMock) as mock_query:
         
-        # Setup mock_insert to return different values for different calls
-        mock_insert.side_effect = [
-            {  # Withdrawal transaction
-                'id': uuid4(),
-                'account_id': mock_account['id'],
-                'transaction_type': TransactionType.WITHDRAWAL,
-                'amount': transfer_amount,
-                'balance_after': mock_account['balance'] - transfer_amount,
-                'status': TransactionStatus.COMPLETED,
-                'description': f"Transfer to {to_account['account_number']}",
-                'created_at': datetime.now()
-            },
-            {  # Deposit transaction
-                'id': uuid4(),
-                'account_id': to_account['id'],
-                'transaction_type': TransactionType.DEPOSIT,
-                'amount': transfer_amount,
-                'balance_after': to_account['balance'] + transfer_amount,
-                'status': TransactionStatus.COMPLETED,
-                'description': f"Transfer from {mock_account['account_number']}",
-                'created_at': datetime.now()
-            }
+        # One statement locks, debits, credits and records both legs
+        mock_query.side_effect = [
+            [
+                {
+                    'id': uuid4(),
+                    'account_id': mock_account['id'],
+                    'transaction_type': TransactionType.WITHDRAWAL,
+                    'amount': transfer_amount,
+                    'balance_after': mock_account['balance'] - transfer_amount,
+                    'status': TransactionStatus.COMPLETED,
+                    'description': f"Transfer to {to_account['account_number']}",
+                    'created_at': datetime.now()
+                },
+                {
+                    'id': uuid4(),
+                    'account_id': to_account['id'],
+                    'transaction_type': TransactionType.DEPOSIT,
+                    'amount': transfer_amount,
+                    'balance_after': to_account['balance'] + transfer_amount,
+                    'status': TransactionStatus.COMPLETED,
+                    'description': f"Transfer from {mock_account['account_number']}",
+                    'created_at': datetime.now()
+                }
+            ]
         ]
         
         result = await atm_service.transfer(mock_account['id'], to_account['id'], transfer_amount)
         
-        assert result['withdrawal'].transaction_type == TransactionType.WITHDRAWAL
-        assert result['deposit'].transaction_type == TransactionType.DEPOSIT
-        assert result['withdrawal'].amount == transfer_amount
-        assert result['deposit'].amount == transfer_amount
-        assert result['withdrawal'].balance_after == mock_account['balance'] - transfer_amount
-        assert result['deposit'].balance_after == to_account['balance'] + transfer_amount
+        # Both ledger rows are inserted by that same statement
+        assert mock_query.await_count == 1
+        sql, params = mock_query.await_args.args
+        assert sql.count('INSERT INTO transactions') == 1 and 'UNION ALL' in sql
+        assert (params['withdrawal'], params['deposit']) == (TransactionType.WITHDRAWAL.value, TransactionType.DEPOSIT.value)
+        
+        assert result['withdrawal']['transaction_type'] == TransactionType.WITHDRAWAL
+        assert result['deposit']['transaction_type'] == TransactionType.DEPOSIT
+        assert result['withdrawal']['amount'] == transfer_amount
+        assert result['deposit']['amount'] == transfer_amount
+        assert result['withdrawal']['balance_after'] == mock_account['balance'] - transfer_amount
+        assert result['deposit']['balance_after'] == to_account['balance'] + transfer_amount
+
+@pytest.mark.asyncio
+async def test_transfer_insufficient_funds(atm_service, mock_account):
+    to_account = {'id': uuid4(), 'account_number': '0987654321'}
+    
+    with patch.object(atm_service.db, 'execute_query', new_callable=AsyncMock) as mock_query:
+        
+        # Nothing is recorded when the balance does not cover the amount; both accounts exist
+        mock_query.side_effect = [[], [{'n': 2}]]
+        
+        with pytest.raises(ValueError, match="Insufficient funds"):
+            await atm_service.transfer(mock_account['id'], to_account['id'], Decimal('1500.00'))
+        assert mock_query.await_count == 2
+
+@pytest.mark.asyncio
+async def test_transfer_same_account(atm_service, mock_account):
+    with patch.object(atm_service.db, 'execute_query', new_callable=AsyncMock) as mock_query:
+        with pytest.raises(ValueError, match="same account"):
+            await atm_service.transfer(mock_account['id'], mock_account['id'], Decimal('10.00'))
+        mock_query.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_validate_card_valid(atm_service, mock_card, mock_account):
@@ -208,6 +238,6 @@ async def test_get_transaction_history(atm_service, mock_account):
         transactions = await atm_service.get_transaction_history(mock_account['id'])
         
         assert len(transactions) == 1
-        assert transactions[0].transaction_type == TransactionType.DEPOSIT
-        assert transactions[0].amount == Decimal('100.00')
-        assert transactions[0].status == TransactionStatus.COMPLETED 
\ No newline at end of file
+        assert transactions[0]['transaction_type'] == TransactionType.DEPOSIT
+        assert transactions[0]['amount'] == Decimal('100.00')
+        assert transactions[0]['status'] == TransactionStatus.COMPLETED 
\ No newline at end of file
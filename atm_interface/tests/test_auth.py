@@ -0,0 +1,232 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import logging
+import jwt
+import pytest
+from unittest.mock import patch, AsyncMock
+from redis.exceptions import ConnectionError as RedisConnectionError
+from quart import Quart, jsonify, request
+from utils import auth
+from utils.auth import login_required, verify_credentials, generate_reset_token, create_access_token, create_reset_token, verify_token, verify_reset_token, reset_password
+
+def test_tokens_carry_integer_epoch_expiry():
+    """Test issued tokens use plain integer exp claims derived from time.time()"""
+    with patch.object(auth.time, 'time', return_value=1_000_000.5):
+        access = jwt.decode(create_access_token("user-1"), options={"verify_signature": False})
+        reset = jwt.decode(create_reset_token("user-1"), options={"verify_signature": False})
+
+    assert access["exp"] == 1_000_000 + auth._ACCESS_TOKEN_TTL
+    assert reset["exp"] == 1_000_000 + auth._RESET_TOKEN_TTL
+    assert type(access["exp"]) is int and type(reset["exp"]) is int
+
+def test_tokens_match_pyjwt_encoding():
+    """Test hand-signed tokens are byte-for-byte what PyJWT issues for the same claims"""
+    with patch.object(auth.time, 'time', return_value=1_000_000.5):
+        token = create_access_token("user-1")
+    expected = jwt.encode({"user_id": "user-1", "exp": 1_000_000 + auth._ACCESS_TOKEN_TTL}, auth.JWT_SECRET, algorithm="HS256")
+    assert token == expected
+
+def test_verify_token_caches_signature_check():
+    """Test a token is decoded once and then served from the cache"""
+    auth._decode_token.cache_clear()
+    token = create_access_token("user-1")
+
+    assert verify_token(token) == "user-1"
+    assert verify_token(token) == "user-1"
+    info = auth._decode_token.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+def test_verify_token_rechecks_expiry_on_cache_hit():
+    """Test a cached token stops validating once it expires"""
+    token = create_access_token("user-1")
+    assert verify_token(token) == "user-1"
+
+    with patch.object(auth.time, 'time', return_value=time.time() + auth.JWT_EXPIRATION.total_seconds() + 1):
+        assert verify_token(token) is None
+
+def test_verify_token_rejects_invalid_tokens():
+    """Test bad signatures, missing exp and garbage are rejected"""
+    assert verify_token("garbage") is None
+    assert verify_token(jwt.encode({"user_id": "x", "exp": time.time() + 60}, "other-secret")) is None
+    assert verify_token(jwt.encode({"user_id": "x"}, auth.JWT_SECRET)) is None
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected_despite_cache():
+    """Test a revoked token fails verification even when its claims are cached"""
+    token = create_access_token("user-3")
+    assert verify_token(token) == "user-3"
+
+    await auth.revoke_token(token)
+    assert verify_token(token) is None
+    assert verify_token(create_access_token("user-4")) == "user-4"
+
+@pytest.mark.asyncio
+async def test_revocation_is_shared_through_redis():
+    """Test with Redis configured a revocation is a key expiring with the token, seen by every worker"""
+    redis_client = AsyncMock()
+    with patch.object(auth.time, 'time', return_value=1_000_000.5):
+        token = create_access_token("user-8")
+    key = "revoked_token:" + token.rpartition(".")[2]
+
+    with patch.object(auth, 'redis_client', redis_client), \
+         patch.object(auth.time, 'time', return_value=1_000_000.5 + 100):
+        await auth.revoke_token(token)
+        redis_client.set.assert_awaited_once_with(key, 1, ex=auth._ACCESS_TOKEN_TTL - 100)
+        assert token not in auth._revoked_tokens
+
+        redis_client.exists.return_value = 1
+        assert await auth.is_token_revoked(token)
+        redis_client.exists.assert_awaited_with(key)
+
+@pytest.mark.asyncio
+async def test_revocation_falls_back_to_memory_when_redis_fails():
+    """Test a Redis failure keeps the revocation in this process instead of failing the logout"""
+    redis_client = AsyncMock()
+    redis_client.set.side_effect = redis_client.exists.side_effect = RedisConnectionError("Connection refused")
+    token = create_access_token("user-9")
+
+    with patch.object(auth, 'redis_client', redis_client), \
+         patch.object(auth.logger, 'warning') as warning:
+        await auth.revoke_token(token)
+        assert verify_token(token) is None
+        assert not await auth.is_token_revoked(create_access_token("user-10"))
+    assert warning.call_count == 2
+
+def test_verify_token_rejects_tampered_tokens():
+    """Test payload edits, other algorithms and malformed segments fail verification"""
+    header, payload, signature = create_access_token("user-5").split(".")
+    forged = jwt.utils.base64url_encode(b'{"user_id":"admin","exp":9999999999}').decode()
+
+    assert verify_token(f"{header}.{forged}.{signature}") is None
+    assert verify_token(jwt.encode({"user_id": "x", "exp": time.time() + 60}, auth.JWT_SECRET, algorithm="HS384")) is None
+    assert verify_token(jwt.encode({"user_id": "x", "exp": time.time() + 60}, None, algorithm="none")) is None
+    assert verify_token(f"{header}.{payload}") is None
+    assert verify_token(f"{header}.{payload}.{signature}.x") is None
+    assert verify_token(f"{header}.{payload}.!!!") is None
+    assert verify_token(jwt.encode({"user_id": "x", "exp": "never"}, auth.JWT_SECRET)) is None
+
+def test_verify_token_agrees_with_pyjwt():
+    """Test the hand-rolled HS256 check accepts exactly the tokens PyJWT itself accepts"""
+    def pyjwt_accepts(token):
+        try:
+            jwt.decode(token, auth.JWT_SECRET, algorithms=[auth.JWT_ALGORITHM], options={"require": ["exp"]})
+            return True
+        except jwt.InvalidTokenError:
+            return False
+
+    valid = create_access_token("user-6")
+    header, payload, signature = valid.split(".")
+    exp = int(time.time()) + 60
+    tokens = [
+        valid,
+        jwt.encode({"user_id": "x", "exp": exp}, auth.JWT_SECRET, headers={"kid": "1"}),
+        jwt.encode({"user_id": "x", "exp": exp}, "other-secret"),
+        jwt.encode({"user_id": "x", "exp": exp}, auth.JWT_SECRET, algorithm="HS512"),
+        jwt.encode({"user_id": "x", "exp": int(time.time()) - 60}, auth.JWT_SECRET),
+        f"{header}.{payload}.{signature[:-2]}",
+    ]
+    assert [verify_token(t) is not None for t in tokens] == [pyjwt_accepts(t) for t in tokens]
+    assert [pyjwt_accepts(t) for t in tokens] == [True, True, False, False, False, False]
+
+@pytest.mark.asyncio
+async def test_login_required_parses_bearer_header():
+    """Test only an exact "Bearer <token>" header authenticates, and the token reaches the view"""
+    app = Quart(__name__)
+
+    @app.route("/me")
+    @login_required
+    async def me():
+        return jsonify({"user_id": request.user_id, "token": request.access_token})
+
+    client = app.test_client()
+    token = create_access_token("user-7")
+
+    response = await client.get("/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert await response.get_json() == {"user_id": "user-7", "token": token}
+
+    for header in (None, "", "Bearer ", f"bearer {token}", f"Basic {token}", token):
+        headers = {"Authorization": header} if header is not None else {}
+        response = await client.get("/me", headers=headers)
+        assert (await response.get_json())["error"] == "Authentication token is missing"
+    for header in (f"Bearer  {token}", f"Bearer {token} "):
+        response = await client.get("/me", headers={"Authorization": header})
+        assert response.status_code == 401
+
+    # A token revoked by another worker is refused once Redis reports it
+    with patch.object(auth, 'is_token_revoked', new_callable=AsyncMock, return_value=True):
+        response = await client.get("/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+def test_verify_reset_token_requires_reset_type():
+    """Test only reset tokens pass verify_reset_token"""
+    assert verify_reset_token(create_reset_token("user-2")) == "user-2"
+    assert verify_reset_token(create_access_token("user-2")) is None
+
+@pytest.mark.asyncio
+async def test_failed_logins_log_the_same_for_unknown_users(caplog):
+    """Test a wrong PIN and an unknown username leave identical warnings and no INFO noise"""
+    stored = {'id': "00000000-0000-0000-0000-000000000001", 'password_hash': "$argon2id$stored"}
+    caplog.set_level(logging.INFO, logger=auth.logger.name)
+
+    for user in (stored, None):
+        with patch.object(auth.db, 'get_record', new_callable=AsyncMock, return_value=user), \
+             patch.object(auth, 'run_in_hash_pool', new_callable=AsyncMock, return_value=False):
+            assert await verify_credentials("alice", "0000") is None
+
+    assert [(r.levelno, r.getMessage()) for r in caplog.records] == [(logging.WARNING, "Login failed for username alice")] * 2
+
+@pytest.mark.asyncio
+async def test_generate_reset_token_stores_integer_epoch_expiry():
+    """Test the stored expiry is the same integer epoch as the issued token's exp claim"""
+    user_id = "00000000-0000-0000-0000-000000000001"
+    with patch.object(auth.time, 'time', return_value=1_000_000.5), \
+         patch.object(auth.db, 'get_record', new_callable=AsyncMock, return_value={'id': user_id}), \
+         patch.object(auth.db, 'update_record', new_callable=AsyncMock) as update:
+        token = await generate_reset_token("user@example.com")
+
+    stored = update.await_args.args[2]
+    assert stored == {'reset_token': token, 'reset_token_expires': 1_000_000 + auth._RESET_TOKEN_TTL}
+    assert type(stored['reset_token_expires']) is int
+    assert jwt.decode(token, options={"verify_signature": False})["exp"] == stored['reset_token_expires']
+
+@pytest.mark.asyncio
+async def test_reset_password_updates_in_one_conditional_statement():
+    """Test the token match, stored expiry and password change are a single guarded UPDATE"""
+    user_id = "00000000-0000-0000-0000-000000000001"
+    token = create_reset_token(user_id)
+
+    with patch.object(auth.db, 'execute_query', new_callable=AsyncMock, return_value=[{'id': user_id}]) as execute, \
+         patch.object(auth.db, 'get_record', new_callable=AsyncMock) as get_record:
+        assert await reset_password(token, "new-password") is True
+
+    get_record.assert_not_called()
+    execute.assert_awaited_once()
+    sql, params = execute.await_args.args
+    assert sql.strip().startswith("UPDATE users")
+    assert "reset_token = :token AND reset_token_expires > :now" in sql
+    assert params['token'] == token
+    assert str(params['user_id']) == user_id
+    assert params['password_hash'].startswith("$argon2")
+
+@pytest.mark.asyncio
+async def test_reset_password_rejects_unmatched_token():
+    """Test a signed token is refused when the guarded UPDATE matches no row (superseded, used or expired)"""
+    token = create_reset_token("00000000-0000-0000-0000-000000000001")
+
+    with patch.object(auth.db, 'execute_query', new_callable=AsyncMock, return_value=[]):
+        assert await reset_password(token, "new-password") is False
+
+@pytest.mark.asyncio
+async def test_reset_password_rejects_unsigned_token_without_db():
+    """Test tokens failing the signature check never reach the database or the hasher"""
+    with patch.object(auth.db, 'execute_query', new_callable=AsyncMock) as execute, \
+         patch.object(auth, 'run_in_hash_pool', new_callable=AsyncMock) as hasher:
+        assert await reset_password(create_access_token("user-1"), "new-password") is False
+        assert await reset_password("garbage", "new-password") is False
+
+    execute.assert_not_called()
+    hasher.assert_not_called()
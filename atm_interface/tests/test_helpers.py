@@ -5,9 +5,12 @@ from utils.helpers import (
     hash_password, verify_password, format_currency, validate_amount,
     generate_transaction_id, mask_card_number, format_phone_number,
     calculate_fee, is_business_hours, format_timestamp, validate_email,
-    generate_otp, is_valid_account_number
+    generate_otp, is_valid_account_number, password_needs_rehash
 )
+import hashlib
+from argon2 import PasswordHasher
 
+@pytest.mark.slow
 def test_password_hashing():
     """Test password hashing and verification"""
     password = "TestPass123!"
@@ -22,6 +25,27 @@ def test_password_hashing():
     # Test invalid hash format
     assert verify_password(password, "invalid_hash") is False
 
+    assert hashed.startswith("$argon2id$")
+    assert password_needs_rehash(hashed) is False
+
+def test_legacy_password_hash():
+    """Test legacy salted SHA-256 hashes still verify and are flagged for rehash"""
+    password = "TestPass123!"
+    salt = "ab" * 16
+    legacy = f"{salt}${hashlib.sha256((password + salt).encode()).hexdigest()}"
+
+    assert verify_password(password, legacy) is True
+    assert verify_password("WrongPass123!", legacy) is False
+    assert password_needs_rehash(legacy) is True
+
+def test_password_hash_with_other_cost_needs_rehash():
+    """Test hashes made with different Argon2 parameters still verify but are flagged for rehash"""
+    password = "SecurePass123!"
+    cheaper = PasswordHasher(time_cost=1, memory_cost=8 * 1024, parallelism=1).hash(password)
+
+    assert verify_password(password, cheaper) is True
+    assert password_needs_rehash(cheaper) is True
+
 def test_format_currency():
     """Test currency formatting"""
     assert format_currency(1000.50) == "$1,000.50"
@@ -95,6 +119,9 @@ def test_validate_email():
     assert validate_email("@example.com") is False
     assert validate_email("test@.com") is False
     assert validate_email("") is False
+    assert validate_email("test@example.c") is False
+    assert validate_email("test@@example.com") is False
+    assert validate_email("test@example.com\n") is False
 
 def test_generate_otp():
     """Test OTP generation"""
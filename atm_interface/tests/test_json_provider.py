@@ -0,0 +1,102 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import orjson
+from uuid import uuid4
+from decimal import Decimal
+from datetime import datetime, timezone
+from unittest.mock import patch
+from quart import Quart, jsonify
+from asyncpg.pgproto.pgproto import UUID as PgUUID
+from utils import json_provider
+from utils.json_provider import ORJSONProvider, dumps_bytes, stream_json_list
+
+async def _rows(n):
+    for i in range(n):
+        yield {
+            'id': uuid4(),
+            'amount': Decimal('10.50'),
+            'balance_after': Decimal(i),
+            'created_at': datetime(2024, 1, 1, tzinfo=timezone.utc)
+        }
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+@pytest.mark.asyncio
+async def test_stream_json_list_empty():
+    """Test an empty iterator still yields a complete document"""
+    assert await _collect(await stream_json_list("history", _rows(0))) == [b'{"history":[]}']
+
+@pytest.mark.asyncio
+async def test_stream_json_list_matches_buffered_encoding():
+    """Test the streamed chunks join to the same document as encoding the full list"""
+    rows = [row async for row in _rows(50)]
+
+    async def replay():
+        for row in rows:
+            yield row
+
+    with patch.object(json_provider, 'STREAM_CHUNK_SIZE', 256):
+        chunks = await _collect(await stream_json_list("history", replay()))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == dumps_bytes({"history": rows})
+    assert orjson.loads(b"".join(chunks))["history"][0]["amount"] == "10.50"
+
+@pytest.mark.asyncio
+async def test_stream_json_list_closes_items_when_closed_early():
+    """Test closing the stream mid-way (e.g. a client disconnect) closes the row iterator too"""
+    closed = []
+
+    async def rows():
+        try:
+            async for row in _rows(1000):
+                yield row
+        finally:
+            closed.append(True)
+
+    with patch.object(json_provider, 'STREAM_CHUNK_SIZE', 256):
+        chunks = await stream_json_list("history", rows())
+        await chunks.__anext__()
+        assert closed == []
+        await chunks.aclose()
+        assert closed == [True]
+
+        # Closed before any chunk is read, e.g. a response that is never sent
+        chunks = await stream_json_list("history", rows())
+        await chunks.aclose()
+        assert closed == [True, True]
+
+@pytest.mark.asyncio
+async def test_stream_json_list_raises_source_errors_before_returning():
+    """Test a source failing on its first item raises to the caller instead of truncating the body"""
+    async def rows():
+        raise RuntimeError("pool timeout")
+        yield
+
+    with pytest.raises(RuntimeError, match="pool timeout"):
+        await stream_json_list("history", rows())
+
+@pytest.mark.asyncio
+async def test_jsonify_uses_orjson_provider():
+    """Test jsonify encodes asyncpg rows (Decimal, asyncpg UUID, datetime) through orjson"""
+    app = Quart(__name__)
+    app.json = ORJSONProvider(app)
+    account_id = uuid4()
+    row = {
+        'id': PgUUID(account_id.bytes),
+        'balance': Decimal('1000.00'),
+        'created_at': datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+    }
+
+    async with app.app_context():
+        response = jsonify(row)
+
+    assert response.mimetype == "application/json"
+    assert await response.get_data() == (
+        b'{"id":"' + str(account_id).encode() + b'","balance":"1000.00",'
+        b'"created_at":"2024-01-01T12:30:00+00:00"}'
+    )
@@ -0,0 +1,160 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from unittest.mock import patch, AsyncMock
+from redis.exceptions import ConnectionError as RedisConnectionError
+from quart import Quart, jsonify
+from utils import rate_limit
+from utils.rate_limit import check_rate_limit, rate_limit as limit_route, add_rate_limit_headers
+
+@pytest.fixture(autouse=True)
+def clear_store():
+    rate_limit.rate_limit_store.clear()
+    yield
+    rate_limit.rate_limit_store.clear()
+
+def test_check_rate_limit_blocks_after_limit():
+    """Test requests over the bucket capacity are rejected"""
+    key = "rate_limit:login:127.0.0.1"
+    with patch.object(rate_limit.time, 'monotonic', return_value=1000.0):
+        assert check_rate_limit(key, 3, 60) == (True, 2)
+        assert check_rate_limit(key, 3, 60) == (True, 1)
+        assert check_rate_limit(key, 3, 60) == (True, 0)
+        assert check_rate_limit(key, 3, 60) == (False, 0)
+
+        # Other clients have their own bucket
+        assert check_rate_limit("rate_limit:login:10.0.0.1", 3, 60) == (True, 2)
+
+def test_check_rate_limit_refills_over_time():
+    """Test tokens come back one per window / limit seconds, up to the capacity"""
+    key = "rate_limit:login:127.0.0.1"
+    with patch.object(rate_limit.time, 'monotonic', return_value=1000.0):
+        for _ in range(3):
+            check_rate_limit(key, 3, 60)
+        assert check_rate_limit(key, 3, 60) == (False, 0)
+
+    # One token refills after 20 seconds, so no burst at a window boundary
+    with patch.object(rate_limit.time, 'monotonic', return_value=1020.0):
+        assert check_rate_limit(key, 3, 60) == (True, 0)
+        assert check_rate_limit(key, 3, 60) == (False, 0)
+
+    # A long idle period refills the bucket only to its capacity
+    with patch.object(rate_limit.time, 'monotonic', return_value=5000.0):
+        assert check_rate_limit(key, 3, 60) == (True, 2)
+
+def test_check_rate_limit_no_burst_across_window_boundary():
+    """Test draining the bucket either side of a window boundary admits no second full burst"""
+    key = "rate_limit:login:127.0.0.1"
+    with patch.object(rate_limit.time, 'monotonic', return_value=1059.0):
+        assert sum(check_rate_limit(key, 60, 60)[0] for _ in range(100)) == 60
+    with patch.object(rate_limit.time, 'monotonic', return_value=1061.0):
+        assert sum(check_rate_limit(key, 60, 60)[0] for _ in range(100)) == 2
+
+    # The whole per-client state is a single timestamp
+    assert rate_limit.rate_limit_store == {key: pytest.approx(1121.0)}
+
+def test_check_rate_limit_inexact_interval():
+    """Test the full capacity is usable when window / limit is not exact in floating point"""
+    with patch.object(rate_limit.time, 'monotonic', return_value=1760000000.123):
+        results = [check_rate_limit("rate_limit:login:127.0.0.1", 7, 60) for _ in range(8)]
+    assert results == [(True, n) for n in range(6, -1, -1)] + [(False, 0)]
+
+def test_check_rate_limit_fast_path_only_touches_own_key():
+    """Test admitted requests under the store bound never sweep other clients' buckets"""
+    with patch.object(rate_limit, '_sweep_rate_limit_store') as sweep, \
+         patch.object(rate_limit.time, 'monotonic', return_value=1000.0):
+        for i in range(50):
+            assert check_rate_limit(f"rate_limit:login:client{i % 5}", 60, 60)[0]
+    sweep.assert_not_called()
+    assert all(type(full_at) is float for full_at in rate_limit.rate_limit_store.values())
+    assert len(rate_limit.rate_limit_store) == 5
+
+def test_rate_limit_store_is_bounded():
+    """Test refilled buckets are swept and the store never exceeds its bound"""
+    with patch.object(rate_limit, 'RATE_LIMIT_MAX_KEYS', 10):
+        with patch.object(rate_limit.time, 'monotonic', return_value=1000.0):
+            for i in range(10):
+                check_rate_limit(f"rate_limit:login:client{i}", 3, 60)
+        assert len(rate_limit.rate_limit_store) == 10
+
+        # All earlier buckets have refilled, so the sweep clears them
+        with patch.object(rate_limit.time, 'monotonic', return_value=1100.0):
+            check_rate_limit("rate_limit:login:new", 3, 60)
+        assert list(rate_limit.rate_limit_store) == ["rate_limit:login:new"]
+
+        # With every bucket still draining, the ones nearest to full are evicted
+        # and a client that drained its bucket first keeps its limit
+        with patch.object(rate_limit.time, 'monotonic', return_value=1100.0):
+            for _ in range(3):
+                check_rate_limit("rate_limit:login:heavy", 3, 60)
+            for i in range(20):
+                check_rate_limit(f"rate_limit:login:client{i}", 3, 60)
+            assert len(rate_limit.rate_limit_store) <= 10
+            assert "rate_limit:login:client19" in rate_limit.rate_limit_store
+            assert check_rate_limit("rate_limit:login:heavy", 3, 60) == (False, 0)
+
+@pytest.mark.asyncio
+async def test_rate_limit_headers_added_by_after_request_hook():
+    """Test the hook adds headers to plain, tuple and error-handler responses, and 429s carry none"""
+    app = Quart(__name__)
+    app.after_request(add_rate_limit_headers)
+
+    @app.errorhandler(ValueError)
+    async def handle_value_error(e):
+        return jsonify({"error": str(e)}), 400
+
+    @app.route("/plain")
+    @limit_route(limit=2, window=60)
+    async def plain():
+        return jsonify({"ok": True})
+
+    @app.route("/created")
+    @limit_route(limit=2, window=60)
+    async def created():
+        return jsonify({"ok": True}), 201
+
+    @app.route("/fails")
+    @limit_route(limit=2, window=60)
+    async def fails():
+        raise ValueError("bad input")
+
+    @app.route("/unlimited")
+    async def unlimited():
+        return jsonify({"ok": True})
+
+    client = app.test_client()
+    with patch.object(rate_limit, 'token_bucket', None):
+        for path, status in (("/plain", 200), ("/created", 201), ("/fails", 400)):
+            response = await client.get(path)
+            assert response.status_code == status
+            assert response.headers["X-RateLimit-Limit"] == "2"
+            assert response.headers["X-RateLimit-Remaining"] == "1"
+
+        await client.get("/plain")
+        response = await client.get("/plain")
+        assert response.status_code == 429
+        assert "X-RateLimit-Remaining" not in response.headers
+        assert "X-RateLimit-Limit" not in (await client.get("/unlimited")).headers
+
+@pytest.mark.asyncio
+async def test_rate_limit_falls_back_to_memory_when_redis_fails():
+    """Test a Redis failure degrades to the in-memory bucket with a warning instead of an error"""
+    app = Quart(__name__)
+    app.after_request(add_rate_limit_headers)
+
+    @app.route("/login")
+    @limit_route(limit=2, window=60)
+    async def login():
+        return jsonify({"ok": True})
+
+    error = RedisConnectionError("Connection refused")
+    with patch.object(rate_limit, 'token_bucket', object()), \
+         patch.object(rate_limit, 'check_redis_rate_limit', new_callable=AsyncMock, side_effect=error), \
+         patch.object(rate_limit.logger, 'warning') as warning:
+        statuses = [(await app.test_client().get("/login")).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    warning.assert_called_with("Redis rate limit check failed, using in-memory limit: %s", error)
+
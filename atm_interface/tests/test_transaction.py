@@ -1,6 +1,13 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import pytest
 from uuid import uuid4
 from decimal import Decimal
+from datetime import datetime
+from pydantic import ValidationError
+from models.transaction import Transaction, TransactionType
 
 @pytest.fixture
 def mock_account():
@@ -11,3 +18,21 @@ def mock_account():
         'status': 'ACTIVE',
         'account_number': '1234567890'
     }
+
+def test_transaction_amounts_are_exact(mock_account):
+    """Test amounts stay exact Decimals and reject sub-cent or non-positive values"""
+    transaction = Transaction(
+        id=uuid4(),
+        account_id=mock_account['id'],
+        transaction_type=TransactionType.DEPOSIT,
+        amount=0.1,
+        balance_after=mock_account['balance'] + Decimal('0.1'),
+        created_at=datetime.now()
+    )
+    assert transaction.amount + Decimal('0.2') == Decimal('0.3')
+    assert transaction.balance_after == Decimal('1000.10')
+
+    with pytest.raises(ValidationError):
+        Transaction(**{**transaction.model_dump(), 'amount': Decimal('10.005')})
+    with pytest.raises(ValidationError):
+        Transaction(**{**transaction.model_dump(), 'amount': 0})
@@ -5,10 +5,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pytest
 from uuid import uuid4
 from datetime import datetime
-from models.user import UserBase, UserCreate, UserUpdate, User, UserLogin
+from models.user import UserBase, UserCreate, UserUpdate, User, UserLogin, ResetRequestSchema, ResetConfirmSchema
 from pydantic import EmailStr, ValidationError
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def valid_user_data():
     return {
         'username': 'testuser123',
@@ -18,7 +18,7 @@ def valid_user_data():
         'pin': '1234'
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_user():
     return {
         'id': uuid4(),
@@ -99,6 +99,19 @@ def test_user_update_invalid_password():
         UserUpdate(**update_data)
     assert 'Password must contain at least one uppercase letter' in str(exc_info.value)
 
+def test_user_update_password_strength():
+    """Test each password character-class requirement"""
+    assert UserUpdate(password='StrongPass1!').password == 'StrongPass1!'
+    with pytest.raises(ValidationError) as exc_info:
+        UserUpdate(password='STRONGPASS1!')
+    assert 'Password must contain at least one lowercase letter' in str(exc_info.value)
+    with pytest.raises(ValidationError) as exc_info:
+        UserUpdate(password='StrongPass!!')
+    assert 'Password must contain at least one number' in str(exc_info.value)
+    with pytest.raises(ValidationError) as exc_info:
+        UserUpdate(password='StrongPass12')
+    assert 'Password must contain at least one special character' in str(exc_info.value)
+
 def test_user_model(mock_user):
     """Test the User model with complete data"""
     user = User(**mock_user)
@@ -132,3 +145,14 @@ def test_user_base_optional_phone():
     assert user.full_name == user_data['full_name']
     assert user.email == user_data['email']
     assert user.phone_number is None
+
+def test_reset_schemas():
+    """Test password reset request and confirm schemas"""
+    assert ResetRequestSchema(email='test@example.com').email == 'test@example.com'
+    with pytest.raises(ValidationError):
+        ResetRequestSchema(email='invalid-email')
+
+    confirm = ResetConfirmSchema(token='abc', new_password='Str0ng!Pass')
+    assert confirm.new_password == 'Str0ng!Pass'
+    with pytest.raises(ValidationError):
+        ResetConfirmSchema(token='abc', new_password='short')
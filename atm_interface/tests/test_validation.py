@@ -0,0 +1,81 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from uuid import uuid4
+from unittest.mock import patch
+from quart import Quart, jsonify, request
+from utils.json_provider import ORJSONProvider
+from utils import validation
+from utils.validation import validate_request, AmountSchema, PaginationParams
+
+@pytest.fixture
+def client():
+    app = Quart(__name__)
+    app.json = ORJSONProvider(app)
+
+    @app.route("/items")
+    @validate_request(query_params=PaginationParams)
+    async def items():
+        params = request.validated_params
+        return jsonify({"after": params.after, "per_page": params.per_page})
+
+    @app.route("/amount", methods=["POST"])
+    @validate_request(AmountSchema)
+    async def amount():
+        return jsonify({"amount": request.validated_data.amount})
+
+    return app.test_client()
+
+@pytest.mark.asyncio
+async def test_query_params_are_validated_and_coerced(client):
+    """Test query strings are coerced to the schema types, taking the first value of repeated keys"""
+    after = uuid4()
+    response = await client.get(f"/items?after={after}&per_page=5&per_page=7&sort=name")
+    assert response.status_code == 200
+    assert await response.get_json() == {"after": str(after), "per_page": 5}
+
+    response = await client.get("/items")
+    assert await response.get_json() == {"after": None, "per_page": 10}
+
+@pytest.mark.asyncio
+async def test_invalid_query_params_are_rejected(client):
+    """Test out-of-range query parameters get a 400 with the validation details"""
+    response = await client.get("/items?per_page=0")
+    assert response.status_code == 400
+    body = await response.get_json()
+    assert body["error"] == "Validation error"
+    assert body["details"][0]["loc"] == ["per_page"]
+
+@pytest.mark.asyncio
+async def test_json_body_is_validated(client):
+    """Test request bodies are validated from the raw JSON text"""
+    response = await client.post("/amount", json={"amount": "12.50"})
+    assert response.status_code == 200
+    assert await response.get_json() == {"amount": "12.50"}
+
+    response = await client.post("/amount", json={"amount": "1.005"})
+    assert response.status_code == 400
+    assert (await response.get_json())["details"][0]["loc"] == ["amount"]
+
+@pytest.mark.asyncio
+async def test_non_json_body_is_rejected(client):
+    """Test a route with a body schema answers a missing or non-JSON body with a 400, not a handler error"""
+    for kwargs in ({}, {"form": {"amount": "12.50"}}, {"data": "amount=12.50"}):
+        response = await client.post("/amount", **kwargs)
+        assert response.status_code == 400
+        assert await response.get_json() == {"error": "Request body must be JSON"}
+
+@pytest.mark.asyncio
+async def test_unexpected_validation_errors_do_not_leak_details(client):
+    """Test an unexpected failure while validating is logged and answered with a fixed message"""
+    error = RuntimeError("decoder internals")
+    with patch.object(AmountSchema, 'model_validate_json', side_effect=error), \
+         patch.object(validation.logger, 'exception') as log:
+        response = await client.post("/amount", json={"amount": "12.50"})
+
+    assert response.status_code == 400
+    assert await response.get_json() == {"error": "Invalid request"}
+    assert log.call_args.kwargs["exc_info"] is error
+
@@ -0,0 +1,47 @@
+"""Generate static/swagger.yaml for the Swagger UI.
+
+Run at build/deploy time so the app itself never imports PyYAML:
+
+    python tools/gen_swagger.py
+"""
+import os
+import yaml
+
+OUTPUT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'swagger.yaml')
+
+swagger_yaml = {
+    'openapi': '3.0.0',
+    'info': {
+        'title': 'ATM Interface API',
+        'version': '1.0.0',
+        'description': 'API for ATM interface operations'
+    },
+    'servers': [
+        {
+            'url': 'http://localhost:5000',
+            'description': 'Development server'
+        }
+    ],
+    'components': {
+        'securitySchemes': {
+            'bearerAuth': {
+                'type': 'http',
+                'scheme': 'bearer',
+                'bearerFormat': 'JWT'
+            }
+        }
+    },
+    'security': [
+        {
+            'bearerAuth': []
+        }
+    ]
+}
+
+def main():
+    """Write the Swagger YAML file into the static folder."""
+    with open(OUTPUT_PATH, 'w') as f:
+        yaml.dump(swagger_yaml, f, default_flow_style=False)
+
+if __name__ == '__main__':
+    main()
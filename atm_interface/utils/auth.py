@@ -1,15 +1,25 @@
-from datetime import datetime, timedelta
-from typing import Optional
-import jwt
-from functools import wraps
-from flask import request, jsonify
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+from jwt.utils import base64url_decode, base64url_encode
+from functools import lru_cache, wraps
+from quart import request, jsonify
 from db.db_config import db
-import asyncio
 import os
 from dotenv import load_dotenv
 import secrets
+import hmac
+import hashlib
+import orjson
 import logging
-from utils.helpers import verify_password, hash_password
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from redis.exceptions import RedisError
+from utils.helpers import verify_password, hash_password, password_needs_rehash
+# Same client as the rate limiter: None unless REDIS_URL is set
+from utils.rate_limit import redis_client
 
 # Load environment variables
 load_dotenv()
@@ -19,110 +29,230 @@ JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key")  # Change this in produc
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION = timedelta(hours=24)
 RESET_TOKEN_EXPIRATION = timedelta(hours=1)
+# Lifetimes as integer seconds so expiries are plain epoch arithmetic
+_ACCESS_TOKEN_TTL = int(JWT_EXPIRATION.total_seconds())
+_RESET_TOKEN_TTL = int(RESET_TOKEN_EXPIRATION.total_seconds())
+# Verified tokens kept per process; each entry is the token string plus a small claims tuple
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+_BEARER_PREFIX = "Bearer "
+_BEARER_PREFIX_LEN = len(_BEARER_PREFIX)
+
+# Key and header segment prepared once at import; JWT_ALGORITHM is HS256,
+# i.e. HMAC-SHA256 over "header.payload", which _encode_token and
+# _decode_token compute directly
+_SIGNING_KEY = JWT_SECRET.encode()
+_HEADER_SEGMENT = base64url_encode(orjson.dumps({"alg": JWT_ALGORITHM, "typ": "JWT"}))
 
 logger = logging.getLogger(__name__)
 
+# Hash checked when the username does not exist, so unknown and known users
+# cost the same hash computation and cannot be told apart by response time
+_DUMMY_PASSWORD_HASH = hash_password(secrets.token_hex(16))
+
+# Worker threads reserved for password hashing, which is CPU-bound and would
+# otherwise block the event loop for every other in-flight request. Argon2
+# runs in C and releases the GIL, so threads hash in parallel without the
+# pickling and worker start-up of a process pool.
+_HASH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="hash")
+
+async def run_in_hash_pool(func, *args):
+    """Run a password hashing function in the hashing thread pool, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_HASH_POOL, func, *args)
+
+def shutdown_hash_pool():
+    """Stop the hashing worker threads."""
+    _HASH_POOL.shutdown(wait=False, cancel_futures=True)
+
+def _encode_token(payload: Dict) -> str:
+    """Sign a payload as an HS256 JWT, the same token jwt.encode would produce."""
+    signing_input = _HEADER_SEGMENT + b"." + base64url_encode(orjson.dumps(payload))
+    signature = hmac.new(_SIGNING_KEY, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + base64url_encode(signature)).decode()
+
 def create_access_token(user_id: str) -> str:
     """Create a JWT access token for the user."""
     payload = {
         "user_id": user_id,
-        "exp": datetime.utcnow() + JWT_EXPIRATION
+        "exp": int(time.time()) + _ACCESS_TOKEN_TTL
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return _encode_token(payload)
 
 def create_reset_token(user_id: str) -> str:
     """Create a password reset token."""
     payload = {
         "user_id": user_id,
         "type": "reset",
-        "exp": datetime.utcnow() + RESET_TOKEN_EXPIRATION
+        "exp": int(time.time()) + _RESET_TOKEN_TTL
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return _encode_token(payload)
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the user_id if valid."""
+# Tokens revoked by logout. With REDIS_URL set they are shared by all workers
+# as Redis keys named after the token's signature, expiring with the token.
+# Otherwise, or if Redis fails, they are kept here mapped to their expiry;
+# this fallback is per-process, so other workers still accept the token.
+# Cached verification would otherwise keep accepting them; entries are
+# dropped once the token expires.
+_REVOKED_KEY_PREFIX = "revoked_token:"
+_revoked_tokens: Dict[str, float] = {}
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _decode_token(token: str) -> Optional[Tuple[Optional[str], Optional[str], float]]:
+    """
+    Check a token's signature once and cache its claims.
+
+    The HS256 signature is checked with hmac directly rather than through
+    jwt.decode, which re-resolves options and the algorithm on every call.
+    Only the small immutable
+    (user_id, type, exp) tuple is kept, not the payload dict. Expiry is not
+    checked here since the result outlives the call; callers compare exp
+    against the current time on every use.
+    """
+    signing_input, _, signature = token.rpartition(".")
+    header_segment, _, payload_segment = signing_input.partition(".")
+    if not header_segment or "." in payload_segment:
+        return None
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload.get("user_id")
-    except jwt.ExpiredSignatureError:
+        expected = hmac.new(_SIGNING_KEY, signing_input.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, base64url_decode(signature)):
+            return None
+        header = orjson.loads(base64url_decode(header_segment))
+        payload = orjson.loads(base64url_decode(payload_segment))
+    except ValueError:  # bad base64 or JSON
+        return None
+    if not isinstance(header, dict) or header.get("alg") != JWT_ALGORITHM or not isinstance(payload, dict):
+        return None
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)) or isinstance(exp, bool):
         return None
-    except jwt.InvalidTokenError:
+    return payload.get("user_id"), payload.get("type"), exp
+
+def verify_token(token: str) -> Optional[str]:
+    """Verify a JWT token and return the user_id if valid."""
+    claims = _decode_token(token)
+    if not claims or claims[2] <= time.time() or token in _revoked_tokens:
         return None
+    return claims[0]
+
+def _revoked_key(token: str) -> str:
+    """Redis key for a revoked token; the HMAC signature identifies it without storing the token."""
+    return _REVOKED_KEY_PREFIX + token.rpartition(".")[2]
+
+async def is_token_revoked(token: str) -> bool:
+    """
+    Check whether another worker revoked a token, via Redis.
+
+    Revocations made by this process are already rejected by verify_token,
+    so this only asks Redis, and answers False when it is not configured.
+    """
+    if redis_client is None:
+        return False
+    try:
+        return bool(await redis_client.exists(_revoked_key(token)))
+    except RedisError as e:
+        # Fall back to this process's revocations rather than failing the request
+        logger.warning("Redis revocation check failed, using in-memory list: %s", e)
+        return False
+
+async def revoke_token(token: str) -> None:
+    """Reject a token for the rest of its lifetime, e.g. on logout."""
+    claims = _decode_token(token)
+    if not claims:
+        return
+    now = time.time()
+    if claims[2] <= now:
+        return
+    if redis_client is not None:
+        try:
+            # The key lives as long as the token does, so Redis drops it once it is moot
+            await redis_client.set(_revoked_key(token), 1, ex=max(1, math.ceil(claims[2] - now)))
+            return
+        except RedisError as e:
+            logger.warning("Redis token revocation failed, revoking in this process only: %s", e)
+    # Expired tokens fail verification anyway, so keep only live ones
+    for expired in [t for t, exp in _revoked_tokens.items() if exp <= now]:
+        del _revoked_tokens[expired]
+    _revoked_tokens[token] = claims[2]
 
 def verify_reset_token(token: str) -> Optional[str]:
     """Verify a password reset token and return the user_id if valid."""
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        if payload.get("type") != "reset":
-            return None
-        return payload.get("user_id")
-    except jwt.ExpiredSignatureError:
+    claims = _decode_token(token)
+    if not claims or claims[2] <= time.time():
         return None
-    except jwt.InvalidTokenError:
+    if claims[1] != "reset":
         return None
+    return claims[0]
 
 def login_required(f):
-    """Decorator to protect routes that require authentication."""
+    """
+    Decorator to protect routes that require authentication.
+
+    Stays a coroutine: Quart runs a plain function view in a worker thread,
+    which would cost far more than the await it saves.
+    """
     @wraps(f)
     async def decorated(*args, **kwargs):
+        # Resolve the context-local proxy once for the header read and the attribute writes
+        req = request._get_current_object()
         token = None
         
-        # Get token from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
+        # Get token from Authorization header; slice off the prefix rather than split
+        auth_header = req.headers.get('Authorization')
+        if auth_header and auth_header.startswith(_BEARER_PREFIX):
+            token = auth_header[_BEARER_PREFIX_LEN:]
         
         if not token:
             return jsonify({"error": "Authentication token is missing"}), 401
         
         user_id = verify_token(token)
-        if not user_id:
+        if not user_id or await is_token_revoked(token):
             return jsonify({"error": "Invalid or expired token"}), 401
         
-        # Add user_id to request context
-        request.user_id = user_id
+        # Add user_id and token to request context
+        req.user_id = user_id
+        req.access_token = token
         return await f(*args, **kwargs)
     
     return decorated
 
-def verify_credentials(username: str, pin: str) -> Optional[str]:
+async def _rehash_password(user_id, pin: str) -> None:
+    """Upgrade a legacy or outdated hash after a successful login."""
+    try:
+        new_hash = await run_in_hash_pool(hash_password, pin)
+        await db.update_record('users', {'id': user_id}, {'password_hash': new_hash})
+    except Exception as e:
+        # The login itself succeeded; the upgrade is retried on the next one
+        logger.warning("Failed to rehash password for user %s: %s", user_id, e)
+
+async def verify_credentials(username: str, pin: str) -> Optional[str]:
     """Verify user credentials and return user_id if valid."""
     try:
-        # Add logging before the database call
-        logger.info(f"Attempting to fetch user with username: {username}")
-
-        # Removed await as db.get_record is now synchronous
-        user = db.get_record('users', {'username': username})
-
-        # Add logging after the database call
-        if user:
-            logger.info(f"User found for username {username}")
-            # Add logging to see the values being compared (existing logging)
-            # Note: PIN logging is disabled for security
-            logger.info(f"Verifying password: Stored Hash={user.get('password_hash')}")
-
-            # Use proper password hashing with the provided PIN
-            if verify_password(pin, user['password_hash']):
-                logger.info(f"Password verification successful for user {username}")
-                return str(user['id'])
-            else:
-                logger.warning(f"Password verification failed for user {username}")
-                return None
-        else:
-            logger.warning(f"User not found for username: {username}")
-            return None
+        user = await db.get_record('users', {'username': username}, columns=('id', 'password_hash'))
+
+        # Always verify a hash, even for unknown users
+        password_hash = user['password_hash'] if user else _DUMMY_PASSWORD_HASH
+        is_valid = await run_in_hash_pool(verify_password, pin, password_hash)
+
+        if user and is_valid:
+            logger.debug("Login succeeded for user %s", username)
+            if password_needs_rehash(password_hash):
+                await _rehash_password(user['id'], pin)
+            return str(user['id'])
+
+        # Same message either way, so the log does not reveal which usernames exist
+        logger.warning("Login failed for username %s", username)
+        return None
     except Exception as e:
-        logger.error(f"Error verifying credentials for user {username}: {str(e)}")
+        logger.error("Error verifying credentials for user %s: %s", username, e)
         # Re-raise the exception for better error propagation
         raise
 
-def generate_reset_token(email: str) -> Optional[str]:
+async def generate_reset_token(email: str) -> Optional[str]:
     """
     Generate a password reset token for a user.
     """
     try:
-        # Removed await
-        user = db.get_record('users', {'email': email})
+        user = await db.get_record('users', {'email': email}, columns=('id',))
         if not user:
             return None
 
@@ -130,10 +260,10 @@ def generate_reset_token(email: str) -> Optional[str]:
         reset_token = create_reset_token(str(user['id']))
 
         # Store the reset token in the database
-        # Removed await
-        db.update_record('users', {'id': user['id']}, {
+        await db.update_record('users', {'id': user['id']}, {
             'reset_token': reset_token,
-            'reset_token_expires': datetime.utcnow() + RESET_TOKEN_EXPIRATION
+            # Stored as epoch seconds, like the token's own exp claim
+            'reset_token_expires': int(time.time()) + _RESET_TOKEN_TTL
         })
 
         return reset_token
@@ -141,7 +271,7 @@ def generate_reset_token(email: str) -> Optional[str]:
         logger.exception("Error generating reset token") # Use exception logging to include traceback
         return None
 
-def reset_password(token: str, new_password: str) -> bool:
+async def reset_password(token: str, new_password: str) -> bool:
     """
     Reset a user's password using a valid reset token.
     """
@@ -150,28 +280,28 @@ def reset_password(token: str, new_password: str) -> bool:
         if not user_id:
             return False
 
-        # Get user and verify token matches
-        # Removed await
-        user = db.get_record('users', {'id': user_id})
-        if not user or user.get('reset_token') != token:
-            return False
-
-        # Check if token has expired
-        if datetime.utcnow() > user.get('reset_token_expires'):
-            return False
-
         # Hash new password
-        hashed_password = hash_password(new_password)
-
-        # Update password and clear reset token
-        # Removed await
-        db.update_record('users', {'id': user_id}, {
-            'password_hash': hashed_password,
-            'reset_token': None,
-            'reset_token_expires': None
-        })
+        hashed_password = await run_in_hash_pool(hash_password, new_password)
 
-        return True
+        # Update password and clear reset token in one round trip, only if this
+        # is still the user's current, unexpired token. The signature check
+        # above is the secret comparison; a used or superseded token fails to
+        # match here, and a NULL (used or never-issued) token matches nothing.
+        rows = await db.execute_query(
+            """
+            UPDATE users SET password_hash = :password_hash, reset_token = NULL, reset_token_expires = NULL
+            WHERE id = :user_id AND reset_token = :token AND reset_token_expires > :now
+            RETURNING id
+            """,
+            {
+                'password_hash': hashed_password,
+                # The uuid column needs a UUID, not the claim's string
+                'user_id': UUID(user_id),
+                'token': token,
+                'now': int(time.time())
+            }
+        )
+        return bool(rows)
     except Exception:
         logger.exception("Error resetting password") # Use exception logging to include traceback
         return False 
\ No newline at end of file
@@ -1,32 +1,65 @@
+import os
 import re
 import hashlib
+import hmac
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional, Union
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_EVEN
 import logging
+from argon2 import PasswordHasher
+from argon2 import exceptions as argon2_exceptions
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Argon2id cost, defaulting to the OWASP-recommended 46 MiB, 3 passes, 1 lane.
+# Tune per host so a hash stays fast enough for interactive logins; stored
+# hashes with other parameters are upgraded on the next successful login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST_KIB = int(os.getenv("ARGON2_MEMORY_COST_KIB", str(46 * 1024)))
+_PASSWORD_HASHER = PasswordHasher(
+    time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST_KIB, parallelism=1, hash_len=32, salt_len=16
+)
+_ARGON2_PREFIX = '$argon2'
+
+# Validation patterns, compiled once at import
+_NON_DIGIT_RE = re.compile(r'\D')
+
+_CENT = Decimal('0.01')
+
+# Mask for the hidden digits of a 16-digit card number
+_PAN_MASK = '*' * 12
+
+# Email character allowlists as translate tables: deleting every allowed
+# character leaves an empty string exactly when the input is valid
+_ASCII_LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_EMAIL_LOCAL_CHARS = str.maketrans('', '', _ASCII_LETTERS + '0123456789._%+-')
+_EMAIL_DOMAIN_CHARS = str.maketrans('', '', _ASCII_LETTERS + '0123456789.-')
+_EMAIL_TLD_CHARS = str.maketrans('', '', _ASCII_LETTERS)
+
 def hash_password(password: str) -> str:
     """
-    Hash a password using SHA-256 with a random salt.
+    Hash a password using Argon2id.
     
     Args:
         password (str): The password to hash
         
     Returns:
-        str: The hashed password with salt
+        str: The encoded Argon2id hash, including its salt and parameters
     """
-    salt = secrets.token_hex(16)
-    hash_obj = hashlib.sha256((password + salt).encode())
-    return f"{salt}${hash_obj.hexdigest()}"
+    return _PASSWORD_HASHER.hash(password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
     """
     Verify a password against its hash.
+
+    Accepts both Argon2id hashes and legacy salted SHA-256 hashes.
     
     Args:
         password (str): The password to verify
@@ -36,21 +69,50 @@ def verify_password(password: str, hashed_password: str) -> bool:
         bool: True if password matches, False otherwise
     """
     try:
-        # Add logging to see the values being compared
-        logger.info(f"Verifying password: Entered={password}, Hashed={hashed_password}")
-
-        salt, stored_hash = hashed_password.split('$')
-        logger.info(f"Verifying password: Salt={salt}, Stored Hash={stored_hash}")
-
-        hash_obj = hashlib.sha256((password + salt).encode())
-        calculated_hash = hash_obj.hexdigest()
-        logger.info(f"Verifying password: Calculated Hash={calculated_hash}")
-
-        return calculated_hash == stored_hash
+        if hashed_password.startswith(_ARGON2_PREFIX):
+            return _PASSWORD_HASHER.verify(hashed_password, password)
+        return _verify_legacy_password(password, hashed_password)
+    except argon2_exceptions.VerificationError:
+        return False
     except Exception as e:
         logger.error(f"Error verifying password: {str(e)}")
         return False
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored hash should be replaced with a fresh Argon2id hash.
+    
+    Args:
+        hashed_password (str): The stored password hash
+        
+    Returns:
+        bool: True for legacy SHA-256 hashes or outdated Argon2 parameters
+    """
+    if not hashed_password.startswith(_ARGON2_PREFIX):
+        return True
+    return _PASSWORD_HASHER.check_needs_rehash(hashed_password)
+
+def _verify_legacy_password(password: str, hashed_password: str) -> bool:
+    """
+    Verify a legacy "salt$sha256hex" hash created before the Argon2 migration.
+
+    Read-only: the digest scheme is fixed by the hashes already stored, and
+    each one is replaced with Argon2id on the user's next successful login.
+    """
+    salt, stored_hash = hashed_password.split('$')
+    # Feed the parts separately rather than hashing a concatenated copy
+    hash_obj = hashlib.sha256(password.encode())
+    hash_obj.update(salt.encode())
+
+    # Constant-time comparison of the raw digests so the match length does not leak through timing
+    return hmac.compare_digest(hash_obj.digest(), bytes.fromhex(stored_hash))
+
+def _to_decimal(amount: Union[float, Decimal, str]) -> Decimal:
+    """Convert to Decimal, skipping the str() round trip for Decimal input."""
+    if isinstance(amount, Decimal):
+        return amount
+    return Decimal(str(amount))
+
 def format_currency(amount: Union[float, Decimal, str]) -> str:
     """
     Format a number as currency.
@@ -62,7 +124,7 @@ def format_currency(amount: Union[float, Decimal, str]) -> str:
         str: Formatted currency string
     """
     try:
-        amount = Decimal(str(amount))
+        amount = _to_decimal(amount)
         if amount < 0:
             return f"-${abs(amount):,.2f}"
         return f"${amount:,.2f}"
@@ -81,7 +143,7 @@ def validate_amount(amount: Union[float, Decimal, str]) -> bool:
         bool: True if valid, False otherwise
     """
     try:
-        amount = Decimal(str(amount))
+        amount = _to_decimal(amount)
         if amount <= 0:
             return False
         # Check if amount has more than 2 decimal places
@@ -113,9 +175,15 @@ def mask_card_number(card_number: str) -> str:
     Returns:
         str: Masked card number
     """
-    if not card_number or len(card_number) < 4:
+    if not card_number:
+        return card_number
+    length = len(card_number)
+    # 16-digit PANs are the common case: reuse the constant mask
+    if length == 16:
+        return _PAN_MASK + card_number[12:]
+    if length < 4:
         return card_number
-    return f"{'*' * (len(card_number) - 4)}{card_number[-4:]}"
+    return f"{'*' * (length - 4)}{card_number[-4:]}"
 
 def format_phone_number(phone: str) -> Optional[str]:
     """
@@ -131,7 +199,7 @@ def format_phone_number(phone: str) -> Optional[str]:
         return None
     
     # Remove all non-digit characters
-    digits = re.sub(r'\D', '', phone)
+    digits = _NON_DIGIT_RE.sub('', phone)
     
     # Check if the number is valid
     if len(digits) < 10 or len(digits) > 15:
@@ -157,9 +225,9 @@ def calculate_fee(amount: Decimal, fee_percentage: float = 0.01) -> Decimal:
         Decimal: Calculated fee
     """
     try:
-        fee = amount * Decimal(str(fee_percentage))
+        fee = amount * _to_decimal(fee_percentage)
         # Round to 2 decimal places
-        return Decimal(str(round(fee, 2)))
+        return fee.quantize(_CENT, rounding=ROUND_HALF_EVEN)
     except Exception as e:
         logger.error(f"Error calculating fee: {str(e)}")
         return Decimal('0.00')
@@ -171,11 +239,7 @@ def is_business_hours() -> bool:
     Returns:
         bool: True if within business hours, False otherwise
     """
-    now = datetime.now()
-    start_time = now.replace(hour=9, minute=0, second=0, microsecond=0)
-    end_time = now.replace(hour=17, minute=0, second=0, microsecond=0)
-    
-    return start_time <= now <= end_time
+    return 9 <= datetime.now().hour < 17
 
 def format_timestamp(timestamp: datetime) -> str:
     """
@@ -199,12 +263,25 @@ def validate_email(email: str) -> bool:
     Returns:
         bool: True if valid, False otherwise
     """
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    # Linear split-and-check; unlike a backtracking regex it cannot blow up on adversarial input
+    if email.count('@') != 1:
+        return False
+    local, domain = email.split('@')
+    if not local or local.translate(_EMAIL_LOCAL_CHARS):
+        return False
+    host, dot, tld = domain.rpartition('.')
+    if not dot or not host or host.translate(_EMAIL_DOMAIN_CHARS):
+        return False
+    return len(tld) >= 2 and not tld.translate(_EMAIL_TLD_CHARS)
 
 def generate_otp(length: int = 6) -> str:
     """
     Generate a one-time password.
+
+    Uses a single secrets.randbelow draw: one CSPRNG read that is retried
+    only in the rare case it falls outside 10**length, so every OTP is
+    exactly equally likely. Reducing os.urandom bytes modulo 10**length
+    would save that retry but bias the low values slightly.
     
     Args:
         length (int): Length of OTP (default: 6)
@@ -212,7 +289,7 @@ def generate_otp(length: int = 6) -> str:
     Returns:
         str: Generated OTP
     """
-    return ''.join(secrets.choice('0123456789') for _ in range(length))
+    return f"{secrets.randbelow(10 ** length):0{length}d}"
 
 def is_valid_account_number(account_number: Optional[str]) -> bool:
     """
@@ -226,5 +303,5 @@ def is_valid_account_number(account_number: Optional[str]) -> bool:
     """
     if account_number is None:
         return False
-    # Basic validation: 10 digits
-    return bool(re.match(r'^\d{10}$', account_number))
+    # Basic validation: 10 digits (isdecimal matches exactly what \d does)
+    return len(account_number) == 10 and account_number.isdecimal()
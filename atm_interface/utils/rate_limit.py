@@ -1,98 +1,194 @@
 from functools import wraps
-from flask import request, jsonify
+from heapq import nsmallest
+from operator import itemgetter
+from quart import g, request
 import time
 from typing import Optional, Tuple, Dict
-from collections import defaultdict
-import asyncio
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from dotenv import load_dotenv
+from utils.json_provider import dumps_bytes
+import logging
+import os
 
-# In-memory storage for rate limiting
-rate_limit_store: Dict[str, Dict[str, int]] = defaultdict(dict)
-rate_limit_lock = asyncio.Lock()
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# In-memory token buckets for rate limiting: key -> time.monotonic() at which
+# the bucket is full again, so wall-clock adjustments cannot refill or stall
+# it. A missing key is a full bucket, so full buckets can be dropped. Bounded:
+# once full, refilled buckets are swept before a new key is added, then the
+# buckets nearest to full if that is not enough.
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+rate_limit_store: Dict[str, float] = {}
+_TOKEN_TOLERANCE = 1e-3
+
+# Token bucket shared across workers via Redis. Refills and takes a token in
+# one atomic round trip, timed by the Redis server clock so workers on hosts
+# with skewed clocks agree (TIME before writes needs Redis 5+).
+# KEYS[1] = bucket key, ARGV = capacity, refill rate/s
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'last_refill')
+local tokens = tonumber(bucket[1]) or capacity
+local last_refill = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last_refill) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'last_refill', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, math.floor(tokens)}
+"""
+
+REDIS_URL = os.getenv("REDIS_URL")
+redis_client: Optional[Redis] = Redis.from_url(REDIS_URL) if REDIS_URL else None
+token_bucket = redis_client.register_script(TOKEN_BUCKET_SCRIPT) if redis_client else None
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 class RateLimitExceeded(Exception):
     pass
 
-async def get_client_identifier() -> str:
+def get_client_identifier() -> str:
     """Get a unique identifier for the client"""
-    # Use X-Forwarded-For if available, otherwise use remote_addr
-    forwarded = request.headers.get('X-Forwarded-For')
+    # Resolve the context-local proxy once, then read the ASGI scope directly
+    req = request._get_current_object()
+    # Use X-Forwarded-For if available, otherwise use the peer address
+    forwarded = req.headers.get('X-Forwarded-For')
     if forwarded:
-        return forwarded.split(',')[0].strip()
-    return request.remote_addr
+        return forwarded.partition(',')[0].strip()
+    client = req.scope.get('client')
+    return client[0] if client else req.remote_addr
 
-async def check_rate_limit(key: str, limit: int, window: int) -> Tuple[bool, int]:
+def _sweep_rate_limit_store(now: float) -> None:
+    """Drop refilled buckets; if every bucket is still draining, evict the tenth nearest to full."""
+    refilled = [k for k, full_at in rate_limit_store.items() if full_at <= now]
+    for k in refilled:
+        del rate_limit_store[k]
+    if len(rate_limit_store) >= RATE_LIMIT_MAX_KEYS:
+        # Evicting a bucket refills it, so give that to the quietest clients
+        # and keep the heaviest ones limited
+        nearest_full = nsmallest(RATE_LIMIT_MAX_KEYS // 10 or 1, rate_limit_store.items(), key=itemgetter(1))
+        for k, _ in nearest_full:
+            del rate_limit_store[k]
+
+def check_rate_limit(key: str, limit: int, window: int) -> Tuple[bool, int]:
     """
-    Check if a request is within rate limits
-    
+    Check a request against a per-process token bucket.
+
+    The bucket holds up to ``limit`` tokens and refills one token every
+    ``window / limit`` seconds, matching the Redis bucket. Its state is the
+    time it will be full again: each request pushes that time one refill
+    interval later, and is refused if that would mean owing more than a
+    full bucket.
+
     Args:
         key: Unique key for the rate limit
-        limit: Maximum number of requests allowed in the window
-        window: Time window in seconds
-    
+        limit: Bucket capacity
+        window: Seconds to refill an empty bucket
+
     Returns:
         Tuple of (is_allowed, remaining_requests)
     """
-    current = int(time.time())
-    window_key = f"{key}:{current // window}"
-
-    async with rate_limit_lock:
-        # Clean up old entries
-        for k in list(rate_limit_store[key].keys()):
-            try:
-                window_num = int(k.split(':')[1])
-                if window_num < current // window:
-                    del rate_limit_store[key][k]
-            except (ValueError, IndexError):
-                # If there's any error parsing the key, remove it
-                del rate_limit_store[key][k]
-
-        # Get current count
-        count = rate_limit_store[key].get(window_key, 0)
-        
-        if count >= limit:
-            return False, 0
-        
-        # Increment count
-        rate_limit_store[key][window_key] = count + 1
-        return True, limit - (count + 1)
+    now = time.monotonic()
+    interval = window / limit
+
+    # Nothing in here awaits, so each check runs to completion on the worker's
+    # event loop thread and no lock is needed around the store
+    # A refilled bucket starts over from now
+    full_at = max(rate_limit_store.get(key, now), now)
+
+    full_at += interval
+    # Tokens owed once this request's token is taken; the tolerance absorbs
+    # float error in timestamp arithmetic for intervals that are not exact
+    owed = (full_at - now) / interval
+    if owed > limit + _TOKEN_TOLERANCE:
+        return False, 0
+
+    if key not in rate_limit_store and len(rate_limit_store) >= RATE_LIMIT_MAX_KEYS:
+        _sweep_rate_limit_store(now)
+    rate_limit_store[key] = full_at
+    return True, int(limit - owed + _TOKEN_TOLERANCE)
+
+async def check_redis_rate_limit(key: str, limit: int, window: int) -> Tuple[bool, int]:
+    """
+    Check a request against a Redis-backed token bucket shared by all workers.
+
+    The bucket holds up to ``limit`` tokens and refills at ``limit / window``
+    tokens per second, so bursts are capped without fixed-window edges.
+
+    Args:
+        key: Unique key for the rate limit
+        limit: Bucket capacity
+        window: Seconds to refill an empty bucket
+
+    Returns:
+        Tuple of (is_allowed, remaining_requests)
+    """
+    allowed, remaining = await token_bucket(keys=[key], args=[limit, limit / window])
+    return bool(allowed), int(remaining)
+
+async def add_rate_limit_headers(response):
+    """
+    After-request hook adding X-RateLimit-* headers to rate-limited responses.
+
+    Register with app.after_request; it covers every response shape a view
+    can return, including ones produced by error handlers.
+    """
+    info = g.get("rate_limit_info")
+    if info is not None:
+        limit, remaining, reset = info
+        headers = response.headers
+        headers['X-RateLimit-Limit'] = limit
+        headers['X-RateLimit-Remaining'] = str(remaining)
+        headers['X-RateLimit-Reset'] = str(reset)
+    return response
 
 def rate_limit(limit: int = 60, window: int = 60):
     """
     Decorator to rate limit requests.
+
+    Headers for admitted requests are added by add_rate_limit_headers.
     
     Args:
         limit: Maximum number of requests allowed in the window
         window: Time window in seconds
     """
     def decorator(f):
+        # Rejections only vary by window, so encode the 429 body once per route
+        limited_body = dumps_bytes({"error": "Rate limit exceeded", "retry_after": window})
+        # Per-route part of the bucket key, so each request only appends the client
+        key_prefix = f"rate_limit:{f.__name__}:"
+        limit_header = str(limit)
+
         @wraps(f)
-        def decorated(*args, **kwargs):
-            client_id = asyncio.run(get_client_identifier())
-            key = f"rate_limit:{client_id}:{f.__name__}"
+        async def decorated(*args, **kwargs):
+            key = key_prefix + get_client_identifier()
             
-            is_allowed, remaining = asyncio.run(check_rate_limit(key, limit, window))
+            if token_bucket is not None:
+                try:
+                    is_allowed, remaining = await check_redis_rate_limit(key, limit, window)
+                except RedisError as e:
+                    # Fall back to per-process limiting rather than failing the request
+                    logger.warning("Redis rate limit check failed, using in-memory limit: %s", e)
+                    is_allowed, remaining = check_rate_limit(key, limit, window)
+            else:
+                is_allowed, remaining = check_rate_limit(key, limit, window)
             
             if not is_allowed:
-                return jsonify({
-                    "error": "Rate limit exceeded",
-                    "retry_after": window
-                }), 429
+                return limited_body, 429, _JSON_HEADERS
             
-            # Add rate limit headers
-            response = f(*args, **kwargs)
-
-            # Handle synchronous response
-            if isinstance(response, tuple):
-                response_obj, status_code = response
-                response_obj.headers['X-RateLimit-Limit'] = str(limit)
-                response_obj.headers['X-RateLimit-Remaining'] = str(remaining)
-                response_obj.headers['X-RateLimit-Reset'] = str(int(time.time()) + window)
-                return response_obj, status_code
-            else:
-                response.headers['X-RateLimit-Limit'] = str(limit)
-                response.headers['X-RateLimit-Remaining'] = str(remaining)
-                response.headers['X-RateLimit-Reset'] = str(int(time.time()) + window)
-                return response
+            # The limit header is formatted once per route; only the rest varies
+            g.rate_limit_info = (limit_header, remaining, int(time.time()) + window)
+            return await f(*args, **kwargs)
         
         return decorated
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -0,0 +1,62 @@
+import json
+import os
+from importlib.metadata import version
+from quart import Blueprint, render_template, request, send_from_directory
+import flask_swagger_ui
+
+# Reuse the templates and Swagger UI assets shipped with flask-swagger-ui
+_PACKAGE_DIR = os.path.dirname(flask_swagger_ui.__file__)
+_DIST_DIR = os.path.join(_PACKAGE_DIR, "dist")
+_VERSION = version("flask-swagger-ui")
+
+def get_swaggerui_blueprint(base_url: str, api_url: str, config: dict = None, blueprint_name: str = "swagger_ui") -> Blueprint:
+    """
+    Quart port of flask_swagger_ui.get_swaggerui_blueprint.
+
+    Args:
+        base_url (str): URL prefix the Swagger UI is served under
+        api_url (str): URL of the OpenAPI document
+        config (dict, optional): Extra Swagger UI configuration
+
+    Returns:
+        Blueprint: Blueprint serving the Swagger UI
+    """
+    swagger_ui = Blueprint(
+        blueprint_name,
+        __name__,
+        template_folder=os.path.join(_PACKAGE_DIR, "templates"),
+        url_prefix=base_url,
+    )
+
+    default_config = {
+        "app_name": "Swagger UI",
+        "dom_id": "#swagger-ui",
+        "url": api_url,
+        "layout": "StandaloneLayout",
+        "deepLinking": True,
+    }
+
+    if config:
+        default_config.update(config)
+
+    app_name = default_config.pop("app_name")
+
+    @swagger_ui.route("/")
+    @swagger_ui.route("/<path:path>")
+    async def show(path=None):
+        if not path or path == "index.html":
+            request_config = dict(default_config)
+            if "oauth2RedirectUrl" not in request_config:
+                request_config["oauth2RedirectUrl"] = (
+                    request.base_url.rstrip("/") + "/oauth2-redirect.html"
+                )
+            return await render_template(
+                "index.template.html",
+                base_url=base_url,
+                app_name=app_name,
+                config_json=json.dumps(request_config),
+                version=_VERSION,
+            )
+        return await send_from_directory(_DIST_DIR, path)
+
+    return swagger_ui
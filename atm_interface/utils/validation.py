@@ -1,7 +1,13 @@
 from functools import wraps
-from flask import request, jsonify
+from quart import request, jsonify
 from typing import Dict, Any, Optional, Callable
-from pydantic import BaseModel, ValidationError
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+from pydantic import BaseModel, Field, ValidationError
+import logging
+
+logger = logging.getLogger(__name__)
 
 def validate_request(schema: Optional[BaseModel] = None, query_params: Optional[BaseModel] = None):
     """
@@ -11,42 +17,55 @@ def validate_request(schema: Optional[BaseModel] = None, query_params: Optional[
         schema: Pydantic model for request body validation
         query_params: Pydantic model for query parameters validation
     """
+    # Only declared fields are read from the query string; the rest would be ignored anyway
+    query_fields = tuple(query_params.model_fields) if query_params else ()
+
     def decorator(f: Callable):
         @wraps(f)
-        def decorated(*args, **kwargs):
+        async def decorated(*args, **kwargs):
+            # A handler with a body schema relies on validated_data, so the body must be JSON
+            if schema and not request.is_json:
+                return jsonify({"error": "Request body must be JSON"}), 400
+
             try:
                 # Validate request body if schema is provided
-                if schema and request.is_json:
-                    data = request.get_json()
-                    validated_data = schema(**data)
+                if schema:
+                    # Parse and validate the raw body in one pass, without an intermediate dict
+                    validated_data = schema.model_validate_json(await request.get_data(as_text=True))
                     request.validated_data = validated_data
                 
                 # Validate query parameters if schema is provided
                 if query_params:
-                    validated_params = query_params(**request.args)
+                    # First value per declared key, validated by the compiled core schema
+                    query = request.args
+                    validated_params = query_params.model_validate({k: query[k] for k in query_fields if k in query})
                     request.validated_params = validated_params
-                
-                return f(*args, **kwargs)
             except ValidationError as e:
-                return jsonify({"error": "Validation error", "details": e.errors()}), 400
+                return jsonify({"error": "Validation error", "details": e.errors(include_context=False)}), 400
             except Exception as e:
-                return jsonify({"error": str(e)}), 400
+                # Unexpected failures reading the request stay in the log, not the response
+                logger.exception("Request validation failed on %s %s", request.method, request.path, exc_info=e)
+                return jsonify({"error": "Invalid request"}), 400
+            
+            # Outside the try: errors from the handler itself go to the app's error handlers
+            return await f(*args, **kwargs)
         return decorated
     return decorator
 
 # Common validation schemas
 class PaginationParams(BaseModel):
-    page: int = 1
-    per_page: int = 10
+    after: Optional[UUID] = None
+    per_page: int = Field(10, ge=1, le=100)
 
 class DateRangeParams(BaseModel):
-    start_date: Optional[str] = None
-    end_date: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
 
 class AmountSchema(BaseModel):
-    amount: float
+    # Exact cents, bounded to the DECIMAL(15,2) balance columns
+    amount: Decimal = Field(..., gt=0, max_digits=15, decimal_places=2)
 
 class TransferSchema(BaseModel):
-    from_account_id: str
-    to_account_id: str
-    amount: float 
\ No newline at end of file
+    from_account_id: UUID
+    to_account_id: UUID
+    amount: Decimal = Field(..., gt=0, max_digits=15, decimal_places=2) 
\ No newline at end of file